@@ -22,7 +22,7 @@ from datetime import datetime
 # We'll wrap the imports in try-except to allow basic execution even if modules are missing
 try:
     from config.manager import ConfigManager
-    from services.logger import LoggerService
+    from services.logger import LoggerService, get_logger_service
     from services.task_manager import TaskManager
     from services.scheduler import SchedulerService
     from services.ai_planner import AIPlannerService
@@ -71,7 +71,7 @@ def initialize_app():
     try:
         app_context["config"] = ConfigManager()
         # LoggerService needs log file path, not config
-        logger_service = LoggerService("logs/app.log") 
+        logger_service = get_logger_service("logs/app.log")
         app_context["logger"] = logger_service 
         
         # Assuming TaskManager needs config (and potentially a DB instance implicitly)
@@ -79,6 +79,7 @@ def initialize_app():
         
         # Assuming SchedulerService needs config and task_manager
         app_context["scheduler"] = SchedulerService(app_context["config"], app_context["task_manager"])
+        SchedulerService.add_log_sink(app_context["config"].get('logging.scheduler_file'))
         
         # Initialize AI Planner Service
         app_context["ai_planner"] = AIPlannerService(app_context["config"])
@@ -126,12 +127,13 @@ def signal_handler(sig, frame):
 
 def discover_cleanup_dirs():
     """自动发现本机常见可清理目录"""
+    home = Path.home()
     candidates = [
-        Path.home() / 'Downloads',
-        Path.home() / 'AppData' / 'Local' / 'Temp',
+        home / 'Downloads',
+        home / 'AppData' / 'Local' / 'Temp',
         Path('C:/Windows/Temp'),
         Path('C:/$Recycle.Bin'),
-        Path.home() / 'Desktop',
+        home / 'Desktop',
     ]
     existing = [str(p) for p in candidates if p.exists()]
     return existing
@@ -335,7 +337,8 @@ def run_ai_plan(args):
     # ==== 新增：发现更细致垃圾目录和大文件 ====
     junk_dirs = discover_junk_dirs()
     logger.info(f"发现的垃圾目录: {junk_dirs}")
-    large_file_bases = list(set(scan_paths + junk_dirs + [str(Path.home() / 'Downloads'), str(Path.home() / 'Desktop')]))
+    home = Path.home()
+    large_file_bases = list(set(scan_paths + junk_dirs + [str(home / 'Downloads'), str(home / 'Desktop')]))
     large_files = find_large_files(large_file_bases, min_size_mb=500)
     logger.info(f"发现的大文件（建议人工确认）: {large_files[:5]} ... 共{len(large_files)}个")
     # 只提取大文件路径
@@ -554,6 +557,14 @@ def run_ai_plan(args):
         logger.warning("任务管理器不可用或缺少start_ai_planned_task方法，无法执行清理计划。")
         print("\n错误：当前系统配置无法自动执行清理计划。请联系开发人员。")
 
+def _backoff_delays(initial=0.01, maximum=1.0):
+    """生成指数退避的等待间隔（initial, 2*initial, ... 封顶maximum），短任务能被尽快察觉结束，长任务也不会频繁轮询"""
+    delay = initial
+    while True:
+        yield delay
+        delay = min(delay * 2, maximum)
+
+
 def run_scan(args):
     """Handles the 'scan' command."""
     logger = app_context["logger"]
@@ -581,8 +592,9 @@ def run_scan(args):
         logger.info(f"扫描任务已启动，ID: {scan_id}")
         print("正在扫描，请稍候...")
 
-        # Progress reporting loop (optional, depends on TaskManager implementation)
-        while getattr(task_manager.scanner, '_is_scanning', False): # Check if scanning
+        # Progress reporting loop: 扫描结束时等待立即返回，间隔指数退避
+        delays = _backoff_delays()
+        while not task_manager.wait_scan(timeout=next(delays)):
             try:
                 progress = task_manager.get_scan_progress()
                 # Example progress: adjust format as needed
@@ -595,7 +607,6 @@ def run_scan(args):
                 logger.warning(f"获取扫描进度时出错: {e}")
                 sys.stdout.write("\r正在扫描...") # Fallback message
                 sys.stdout.flush()
-            time.sleep(1) 
         
         sys.stdout.write("\n") # Newline after progress
         logger.info("扫描完成。")
@@ -625,7 +636,7 @@ def run_scan(args):
             task_manager.stop_scan()
         print("\n扫描已中断。")
     except Exception as e:
-        logger.error(f"扫描过程中发生错误: {e}", exc_info=True)
+        logger.exception(f"扫描过程中发生错误: {e}")
         print(f"扫描失败，请查看日志。")
 
 def get_disk_usage(path=None):
@@ -679,8 +690,9 @@ def run_clean(args):
         logger.info(f"清理任务已启动，ID: {task_id}")
         print("正在清理，请稍候...")
         
-        # Progress reporting loop
-        while getattr(task_manager.cleaner, '_is_cleaning', False):
+        # Progress reporting loop: 清理结束时等待立即返回，间隔指数退避
+        delays = _backoff_delays()
+        while not task_manager.wait_clean(timeout=next(delays)):
             try:
                 progress = task_manager.get_clean_progress()
                 progress_percent = progress.get('progress', 0) * 100
@@ -692,7 +704,6 @@ def run_clean(args):
                 logger.warning(f"获取清理进度时出错: {e}")
                 sys.stdout.write("\r正在清理...") 
                 sys.stdout.flush()
-            time.sleep(1)
             
         sys.stdout.write("\n") # Newline after progress
         logger.info("清理完成。")
@@ -742,7 +753,7 @@ def run_clean(args):
             task_manager.stop_clean_task()
         print("\n清理已中断。")
     except Exception as e:
-        logger.error(f"清理过程中发生错误: {e}", exc_info=True)
+        logger.exception(f"清理过程中发生错误: {e}")
         print(f"清理失败，请查看日志。")
 
 def run_restore(args):
@@ -769,7 +780,7 @@ def run_restore(args):
             logger.error("备份还原失败。")
             print("备份还原失败，请查看日志。")
     except Exception as e:
-        logger.error(f"还原备份过程中发生错误: {e}", exc_info=True)
+        logger.exception(f"还原备份过程中发生错误: {e}")
         print(f"还原备份失败，请查看日志。")
 
 def run_list_backups(args):
@@ -800,7 +811,7 @@ def run_list_backups(args):
             print(f"大小: {size / (1024**2):.2f} MB")
             print("-------------------")
     except Exception as e:
-        logger.error(f"获取备份列表时发生错误: {e}", exc_info=True)
+        logger.exception(f"获取备份列表时发生错误: {e}")
         print(f"无法获取备份列表，请查看日志。")
 
 def run_list_duplicates(args):
@@ -835,7 +846,7 @@ def run_list_duplicates(args):
                 print(f"  {j}. {file_path} ({file_size / (1024**2):.2f} MB)")
             print("-------------------")
     except Exception as e:
-        logger.error(f"获取重复文件列表时发生错误: {e}", exc_info=True)
+        logger.exception(f"获取重复文件列表时发生错误: {e}")
         print(f"无法获取重复文件列表，请查看日志。")
 
 def run_schedule(args):
@@ -938,7 +949,7 @@ def run_service(args):
         logger.info("收到用户中断，停止服务...")
         print("\n服务已停止。")
     except Exception as e:
-        logger.error(f"服务运行过程中发生错误: {e}", exc_info=True)
+        logger.exception(f"服务运行过程中发生错误: {e}")
         print(f"服务运行失败，请查看日志。")
     finally:
         # 确保调度器被正确关闭
@@ -1134,7 +1145,7 @@ def main():
     except Exception as e:
         logger = app_context.get("logger")
         if logger:
-            logger.error(f"执行命令时发生错误: {e}", exc_info=True)
+            logger.exception(f"执行命令时发生错误: {e}")
         print(f"执行命令时发生错误: {e}", file=sys.stderr)
         return 1
     finally:
@@ -6,13 +6,36 @@
 """
 
 import os
+import copy
+import functools
+import threading
 from pathlib import Path
 import yaml
 from loguru import logger
 
 
+@functools.lru_cache(maxsize=4)
+def _parse_yaml_cached(path_str, mtime_ns, size):
+    """解析YAML文件，按 (路径, 修改时间, 大小) 缓存，文件变化后自动重新解析"""
+    with open(path_str, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+def _load_yaml(path):
+    """读取YAML文件，同一进程内文件未变化时复用已解析的结果
+
+    返回深拷贝，调用方修改配置不会影响缓存
+    """
+    st = os.stat(path)
+    return copy.deepcopy(_parse_yaml_cached(str(path), st.st_mtime_ns, st.st_size))
+
+
 class ConfigManager:
     """配置管理器类"""
+
+    # 进程内共享的实例，由 shared() 首次调用时创建
+    _shared_instance = None
+    _shared_lock = threading.Lock()
     
     def __init__(self, config_path=None):
         """初始化配置管理器
@@ -31,30 +54,53 @@ class ConfigManager:
         # 加载配置
         self.config = self.load_config()
     
+    @classmethod
+    def shared(cls):
+        """获取进程内共享的配置管理器，只在首次调用时加载配置
+
+        共享实例的修改对所有使用者可见，需要独立修改配置时先调用 clone()
+
+        Returns:
+            共享的配置管理器实例
+        """
+        if cls._shared_instance is None:
+            with cls._shared_lock:
+                if cls._shared_instance is None:
+                    cls._shared_instance = cls()
+        return cls._shared_instance
+
+    def clone(self):
+        """复制一个配置管理器，不重新读取配置文件
+
+        Returns:
+            配置独立的新实例，对其修改不影响原实例
+        """
+        new = self.__class__.__new__(self.__class__)
+        new.__dict__.update(self.__dict__)
+        new.config = copy.deepcopy(self.config)
+        return new
+
     def load_config(self):
         """加载配置，优先使用用户配置，如果不存在则使用默认配置并复制一份"""
         try:
             # 如果用户配置不存在，复制默认配置
             if not self.user_config_path.exists():
                 logger.info(f"用户配置不存在，创建默认配置: {self.user_config_path}")
-                with open(self.default_config_path, 'r', encoding='utf-8') as f:
-                    default_config = yaml.safe_load(f)
+                default_config = _load_yaml(self.default_config_path)
                 
                 with open(self.user_config_path, 'w', encoding='utf-8') as f:
                     yaml.dump(default_config, f, allow_unicode=True, default_flow_style=False)
                 return default_config
             
             # 加载用户配置
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                logger.info(f"从 {self.config_path} 加载配置")
-                return yaml.safe_load(f)
+            logger.info(f"从 {self.config_path} 加载配置")
+            return _load_yaml(self.config_path)
                 
         except Exception as e:
             logger.error(f"加载配置失败: {e}")
             # 如果出错，尝试加载默认配置
             try:
-                with open(self.default_config_path, 'r', encoding='utf-8') as f:
-                    return yaml.safe_load(f)
+                return _load_yaml(self.default_config_path)
             except Exception as e2:
                 logger.error(f"加载默认配置也失败: {e2}")
                 return {}
@@ -6,18 +6,22 @@
 """
 
 import os
+import queue
 import shutil
 import time
 import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Set, Tuple, Optional
+from typing import List, Dict, Set, Tuple, Optional, Iterable, Iterator, Callable
 import threading
 from loguru import logger
 
 from data.models import FileItem, CleanTask, BackupInfo, CleanCategory
 from config.manager import ConfigManager
 
+# 清理结束时最多逐条列出的失败文件数，其余只计入汇总
+FAILURE_LOG_LIMIT = 10
+
 
 class Cleaner:
     """文件清理器，负责安全删除文件"""
@@ -33,6 +37,11 @@ class Cleaner:
         self._stop_event = threading.Event()
         self._pause_event = threading.Event()
         self._is_cleaning = False
+        # 保护 _is_cleaning 的状态切换，使 snapshot() 读到的状态与任务一致
+        self._state_lock = threading.Lock()
+        # 清理结束（完成、出错或被停止）时置位，供调用方等待而无需轮询
+        self._clean_done = threading.Event()
+        self._clean_done.set()
         self._clean_thread = None
         
         # 备份目录路径
@@ -42,14 +51,14 @@ class Cleaner:
         self.backup_dir = Path(backup_dir)
         self.backup_dir.mkdir(exist_ok=True, parents=True)
         
-    def start_clean_task(self, files_to_clean: List[FileItem], 
+    def start_clean_task(self, files_to_clean: Iterable[FileItem],
                       categories: List[CleanCategory] = None, 
                       task_name: str = None,
                       create_backup: bool = None) -> str:
         """启动新的清理任务
         
         Args:
-            files_to_clean: 要清理的文件项列表
+            files_to_clean: 要清理的文件项（可为生成器，只遍历一次）
             categories: 要清理的类别列表，如果不为None，则只清理这些类别的文件
             task_name: 任务名称，如果为None则自动生成
             create_backup: 是否创建备份，如果为None则使用配置值
@@ -69,19 +78,21 @@ class Cleaner:
         if create_backup is None:
             create_backup = self.config.get('safety.backup.enabled', True)
         
-        # 过滤文件列表（如果指定了类别）
-        filtered_files = files_to_clean
-        if categories:
-            filtered_files = [file for file in files_to_clean 
-                             if file.category in categories]
+        # 单次遍历完成类别过滤（如果指定了类别），同时统计总大小和路径
+        category_set = frozenset(categories) if categories else None
+        filtered_files = []
+        file_paths = []
+        total_size = 0
+        for file in files_to_clean:
+            if category_set is None or file.category in category_set:
+                filtered_files.append(file)
+                file_paths.append(file.path)
+                total_size += file.size
         
         if not filtered_files:
             logger.warning("没有符合条件的文件需要清理")
             return ""
         
-        # 计算总大小
-        total_size = sum(file.size for file in filtered_files)
-        
         # 创建任务
         task_id = str(uuid.uuid4())
         if not task_name:
@@ -92,7 +103,7 @@ class Cleaner:
             task_id=task_id,
             name=task_name,
             created_time=datetime.now(),
-            files_to_clean=[file.path for file in filtered_files],
+            files_to_clean=file_paths,
             categories=categories if categories else [],
             status="pending",
             progress=0.0,
@@ -109,7 +120,9 @@ class Cleaner:
                 logger.warning("创建备份失败，但清理任务将继续")
         
         # 启动清理线程
-        self._is_cleaning = True
+        self._clean_done.clear()
+        with self._state_lock:
+            self._is_cleaning = True
         self._clean_thread = threading.Thread(
             target=self._clean_worker, 
             args=(filtered_files,)
@@ -120,11 +133,81 @@ class Cleaner:
         self._clean_thread.start()
         
         logger.info(f"开始新清理任务 {task_id}, 共 {len(filtered_files)} 个文件, 总大小: {total_size / (1024*1024):.2f} MB")
-        # 清理完成后统计空间
-        cleaned_size = sum(f.size for f in files_to_clean)
-        logger.info(f"本次清理释放空间：{cleaned_size / (1024*1024):.2f} MB")
-        print(f"本次清理释放空间：{cleaned_size / (1024*1024):.2f} MB")
         return task_id
+
+    def start_streaming_clean(self, batch_queue: queue.Queue,
+                              file_filter: Optional[Callable[[FileItem], bool]] = None,
+                              categories: List[CleanCategory] = None,
+                              task_name: str = None) -> str:
+        """启动流式清理任务，边从队列读取扫描结果边清理，无需等待扫描完成
+
+        文件逐批到达，无法事先创建整体备份，因此流式清理不创建备份（删除的文件仍会移入回收站）。
+
+        Args:
+            batch_queue: 文件项批次队列（List[FileItem]），None表示结束，见Scanner.start_scan
+            file_filter: 可选过滤函数，返回True的文件才会被清理
+            categories: 要清理的类别列表，仅用于记录到任务中
+            task_name: 任务名称，如果为None则自动生成
+
+        Returns:
+            清理任务ID，如果失败则返回空字符串
+        """
+        if self._is_cleaning:
+            logger.warning("已有清理任务正在运行，请先停止当前任务")
+            return ""
+
+        self._stop_event.clear()
+        self._pause_event.clear()
+
+        task_id = str(uuid.uuid4())
+        if not task_name:
+            now = datetime.now().strftime("%Y%m%d_%H%M%S")
+            task_name = f"清理任务_{now}"
+
+        # 文件列表和总大小随批次到达逐步累加
+        self.current_task = CleanTask(
+            task_id=task_id,
+            name=task_name,
+            created_time=datetime.now(),
+            files_to_clean=[],
+            categories=categories if categories else [],
+            status="pending",
+            progress=0.0,
+            total_size=0,
+            cleaned_size=0,
+        )
+
+        self._clean_done.clear()
+        with self._state_lock:
+            self._is_cleaning = True
+        self._clean_thread = threading.Thread(
+            target=self._clean_worker,
+            args=(self._iter_stream(batch_queue, file_filter, self.current_task),)
+        )
+        self._clean_thread.daemon = True
+        self.current_task.status = "running"
+        self.current_task.start_time = datetime.now()
+        self._clean_thread.start()
+
+        logger.info(f"开始新流式清理任务 {task_id}")
+        return task_id
+
+    def _iter_stream(self, batch_queue: queue.Queue,
+                     file_filter: Optional[Callable[[FileItem], bool]],
+                     task: CleanTask) -> Iterator[FileItem]:
+        """从批次队列中依次产出待清理文件，并把它们计入任务的文件列表和总大小"""
+        while not self._stop_event.is_set():
+            try:
+                batch = batch_queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            if batch is None:
+                return
+            for file_item in batch:
+                if file_filter is None or file_filter(file_item):
+                    task.files_to_clean.append(file_item.path)
+                    task.total_size += file_item.size
+                    yield file_item
     
     def stop_clean_task(self) -> bool:
         """停止当前清理任务
@@ -147,7 +230,9 @@ class Cleaner:
             self.current_task.end_time = datetime.now()
             self.current_task.status = "stopped"
         
-        self._is_cleaning = False
+        with self._state_lock:
+            self._is_cleaning = False
+        self._clean_done.set()
         logger.info("清理任务已停止")
         return True
     
@@ -204,6 +289,29 @@ class Cleaner:
         """检查清理器是否正在清理"""
         return self._is_cleaning
 
+    def snapshot(self) -> Tuple[bool, Optional[CleanTask]]:
+        """一次性获取清理状态和当前任务
+
+        返回的任务是持锁时复制的副本，清理线程之后的修改不会影响调用方。
+
+        Returns:
+            (是否正在清理, 当前清理任务的副本或None)
+        """
+        with self._state_lock:
+            task = self.current_task
+            return self._is_cleaning, task.copy(deep=True) if task is not None else None
+
+    def wait_until_done(self, timeout: Optional[float] = None) -> bool:
+        """等待当前清理任务结束
+
+        Args:
+            timeout: 最长等待秒数，None表示一直等待
+
+        Returns:
+            清理任务是否已结束（超时返回False）
+        """
+        return self._clean_done.wait(timeout)
+
     def get_current_task(self) -> Optional[CleanTask]:
         """获取当前清理任务
         
@@ -281,23 +389,23 @@ class Cleaner:
             logger.exception(f"还原备份失败: {e}")
             return False
     
-    def _clean_worker(self, files: List[FileItem]):
+    def _clean_worker(self, files: Iterable[FileItem]):
         """清理工作线程
         
         Args:
-            files: 要清理的文件项列表
+            files: 要清理的文件项列表，或流式清理时逐步产出文件项的迭代器
         """
         try:
             cleaned_count = 0
             cleaned_size = 0
-            failed_count = 0
+            failed_paths = []
             
             # 更新任务开始状态
             if self.current_task:
                 self.current_task.status = "running"
             
-            # 遍历文件进行清理
-            total_files = len(files)
+            # 遍历文件进行清理；流式清理时文件总数未知，按已清理大小占已到达总大小计算进度
+            total_files = len(files) if isinstance(files, list) else None
             for i, file_item in enumerate(files):
                 # 检查是否应该停止
                 if self._stop_event.is_set():
@@ -309,7 +417,10 @@ class Cleaner:
                 
                 # 更新进度
                 if self.current_task:
-                    self.current_task.progress = i / total_files if total_files > 0 else 1.0
+                    if total_files is not None:
+                        self.current_task.progress = i / total_files if total_files > 0 else 1.0
+                    elif self.current_task.total_size > 0:
+                        self.current_task.progress = min(1.0, cleaned_size / self.current_task.total_size)
                 
                 # 删除文件
                 success = self._safe_delete(file_item.path)
@@ -323,7 +434,7 @@ class Cleaner:
                     if self.current_task:
                         self.current_task.cleaned_size = cleaned_size
                 else:
-                    failed_count += 1
+                    failed_paths.append(file_item.path)
             
             # 更新任务完成状态
             if self.current_task and not self._stop_event.is_set():
@@ -331,9 +442,12 @@ class Cleaner:
                 self.current_task.status = "completed"
                 self.current_task.progress = 1.0
                 
+            # 逐文件只记录调试日志，结束时汇总输出，避免大量文件时日志I/O超过删除本身
+            for failed_path in failed_paths[:FAILURE_LOG_LIMIT]:
+                logger.warning(f"清理失败: {failed_path}")
             logger.info(f"清理完成: 成功删除 {cleaned_count} 个文件, "
                       f"总大小: {cleaned_size / (1024*1024):.2f} MB, "
-                      f"失败: {failed_count} 个文件")
+                      f"失败: {len(failed_paths)} 个文件")
                 
         except Exception as e:
             logger.exception(f"清理过程出错: {e}")
@@ -345,7 +459,9 @@ class Cleaner:
                 self.current_task.end_time = datetime.now()
                 
         finally:
-            self._is_cleaning = False
+            with self._state_lock:
+                self._is_cleaning = False
+            self._clean_done.set()
     
     def _safe_delete(self, path: str) -> bool:
         """安全删除文件或目录，先移动到回收站目录
@@ -372,7 +488,7 @@ class Cleaner:
                 target_path = target_path.with_name(f"{target_path.name}_{int(time.time())}")
             # 移动文件或目录
             shutil.move(str(path_obj), str(target_path))
-            logger.info(f"已移动到回收站: {path} -> {target_path}")
+            logger.debug("已移动到回收站: {} -> {}", path, target_path)
             # 记录回收信息（可扩展为json日志）
             recycle_log = recycle_bin / "recycle_log.json"
             import json
@@ -387,12 +503,12 @@ class Cleaner:
                 json.dump(log_data, f, ensure_ascii=False, indent=2)
             return True
         except PermissionError:
-            logger.warning(f"权限不足，无法移动到回收站: {path}")
+            logger.debug("权限不足，无法移动到回收站: {}", path)
             return False
         except FileNotFoundError:
             return True
         except Exception as e:
-            logger.error(f"移动到回收站失败 {path}: {e}")
+            logger.debug("移动到回收站失败 {}: {}", path, e)
             return False
     
     def _create_backup(self, files: List[FileItem]) -> Optional[str]:
@@ -11,11 +11,15 @@ import json
 from pathlib import Path
 from typing import List, Dict, Optional
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from loguru import logger
 
 from data.models import BackupInfo
 from config.manager import ConfigManager
 
+# 清理旧备份时并发删除备份目录的最大线程数
+BACKUP_DELETE_WORKERS = 8
+
 
 class Rollback:
     """回滚管理器，负责文件还原操作"""
@@ -223,6 +227,31 @@ class Rollback:
             logger.error(f"删除备份失败: {e}")
             return False
     
+    def _find_old_backup_ids(self, cutoff_date: datetime) -> List[str]:
+        """找出创建时间早于截止日期的备份ID
+
+        Args:
+            cutoff_date: 截止日期
+
+        Returns:
+            过期备份ID列表
+        """
+        cutoff_ts = cutoff_date.timestamp()
+        old_ids = []
+        for info_file in self.backup_dir.glob("*.json"):
+            try:
+                # 信息文件在备份创建时写入，修改时间早于截止时间的一定已过期，无需解析JSON
+                if info_file.stat().st_mtime < cutoff_ts:
+                    old_ids.append(info_file.stem)
+                    continue
+                with open(info_file, "r", encoding="utf-8") as f:
+                    backup_data = json.load(f)
+                if datetime.fromisoformat(backup_data.get("created_time")) < cutoff_date:
+                    old_ids.append(backup_data.get("backup_id") or info_file.stem)
+            except Exception as e:
+                logger.warning(f"加载备份信息失败 {info_file}: {e}")
+        return old_ids
+
     def clean_old_backups(self, days: int = None) -> int:
         """清理旧备份
         
@@ -241,23 +270,22 @@ class Rollback:
         try:
             from datetime import timedelta
             
-            # 计算截止日期
+            if not self.backup_dir.exists():
+                return 0
+
+            # 计算截止日期，只读取判断过期所需的信息，不构造完整的备份列表
             cutoff_date = datetime.now() - timedelta(days=days)
-            cleaned_count = 0
-            
-            # 获取所有备份
-            backups = self.list_backups()
+            old_ids = self._find_old_backup_ids(cutoff_date)
+            if not old_ids:
+                return 0
             
-            # 筛选要删除的备份
-            for backup in backups:
-                if backup["created_time"] < cutoff_date:
-                    # 删除备份
-                    if self.delete_backup(backup["backup_id"]):
-                        cleaned_count += 1
+            # 各备份目录互不相关，并发删除
+            with ThreadPoolExecutor(max_workers=min(BACKUP_DELETE_WORKERS, len(old_ids))) as executor:
+                cleaned_count = sum(executor.map(self.delete_backup, old_ids))
             
             logger.info(f"清理旧备份完成，共删除了 {cleaned_count} 个备份")
             return cleaned_count
             
         except Exception as e:
             logger.exception(f"清理旧备份失败: {e}")
-            return 0
\ No newline at end of file
+            return 0
@@ -104,12 +104,15 @@ class RuleManager:
             for r in self.rules
         ]
 
-    def can_delete(self, file_item: 'FileItem', duplicate_sets: Optional[List[List[str]]] = None) -> bool:
+    def can_delete(self, file_item: 'FileItem', duplicate_sets: Optional[List[List[str]]] = None,
+                   duplicate_index: Optional[Dict[str, bool]] = None) -> bool:
         """判断文件是否可以安全删除
         
         Args:
             file_item: 文件项对象
             duplicate_sets: 重复文件集合列表，用于判断重复文件
+            duplicate_index: build_duplicate_index 预先计算的结果，批量判断时传入，
+                避免每个文件都遍历重复文件集合；提供时忽略 duplicate_sets
             
         Returns:
             是否可以安全删除
@@ -141,22 +144,42 @@ class RuleManager:
         if any(self._match_pattern(file_item.path, p) for p in scan_only_dirs):
             return False
             
-        # 检查是否是重复文件
-        if duplicate_sets:
-            for dup_set in duplicate_sets:
-                if file_item.path in dup_set:
-                    # 如果是重复文件，根据保留策略决定是否可删除
-                    keep_strategy = self.config_manager.get("rules.duplicate_files.keep_strategy", "first")
-                    if keep_strategy == "first":
-                        return file_item.path != dup_set[0]
-                    elif keep_strategy == "newest":
-                        newest_file = max(dup_set, key=lambda x: os.path.getmtime(x))
-                        return file_item.path != newest_file
-                    elif keep_strategy == "oldest":
-                        oldest_file = min(dup_set, key=lambda x: os.path.getmtime(x))
-                        return file_item.path != oldest_file
+        # 检查是否是重复文件，重复文件中只有保留的那个不可删除
+        if duplicate_index is None and duplicate_sets:
+            duplicate_index = self.build_duplicate_index(duplicate_sets)
+        if duplicate_index:
+            return duplicate_index.get(file_item.path, True)
                         
         return True
+
+    def build_duplicate_index(self, duplicate_sets: Optional[List[List[str]]]) -> Dict[str, bool]:
+        """按保留策略为每组重复文件选出保留的文件，生成 路径 -> 是否可删除 的索引
+
+        Args:
+            duplicate_sets: 重复文件集合列表
+
+        Returns:
+            重复文件路径到是否可删除的映射；保留策略无法识别时返回空字典
+        """
+        index: Dict[str, bool] = {}
+        if not duplicate_sets:
+            return index
+        keep_strategy = self.config_manager.get("rules.duplicate_files.keep_strategy", "first")
+        for dup_set in duplicate_sets:
+            if not dup_set:
+                continue
+            if keep_strategy == "first":
+                keeper = dup_set[0]
+            elif keep_strategy == "newest":
+                keeper = max(dup_set, key=lambda x: os.path.getmtime(x))
+            elif keep_strategy == "oldest":
+                keeper = min(dup_set, key=lambda x: os.path.getmtime(x))
+            else:
+                return {}
+            for path in dup_set:
+                # 同一路径出现在多个集合时以第一个集合为准
+                index.setdefault(path, path != keeper)
+        return index
         
     def _match_pattern(self, path: str, pattern: str) -> bool:
         """匹配文件路径和模式
@@ -6,6 +6,7 @@
 """
 
 import os
+import stat
 import time
 import uuid
 import hashlib  # Import hashlib for hashing
@@ -14,14 +15,26 @@ from pathlib import Path
 from typing import List, Dict, Tuple, Generator, Optional
 import threading
 import queue
+from collections import OrderedDict
 from loguru import logger
 
 from data.models import FileItem, ScanResult, FileType, CleanCategory
 from config.manager import ConfigManager
 
+# 流式输出扫描结果时每批包含的文件数
+STREAM_BATCH_SIZE = 1000
+
+# 文件内容哈希缓存的最大条目数，超出后淘汰最久未使用的
+HASH_CACHE_MAX_ENTRIES = 50000
+
 
 class Scanner:
     """文件扫描器类，负责扫描C盘文件"""
+
+    # 文件内容哈希缓存，所有扫描器实例共享：{(路径, inode, 修改时间ns, 大小): 哈希值}
+    # 文件未变化时重复扫描无需重新读取内容计算哈希
+    _hash_cache: "OrderedDict[Tuple[str, int, int, int], str]" = OrderedDict()
+    _hash_cache_lock = threading.Lock()
     
     def __init__(self, config_manager=None, process_delay=0):
         """初始化扫描器
@@ -36,18 +49,25 @@ class Scanner:
         self._pause_event = threading.Event()
         self._file_queue = queue.Queue()
         self._is_scanning = False
+        # 扫描结束（完成、出错或被停止）时置位，供调用方等待而无需轮询
+        self._scan_done = threading.Event()
+        self._scan_done.set()
         self._scan_thread = None
         self._process_thread = None
         self._file_hashes: Dict[str, List[str]] = {}  # Store hashes {hash: [paths]}
         self._file_hashes_lock = threading.Lock()
         self.process_delay = process_delay
+        # 流式输出队列，扫描中按批放入已分类的文件项，结束时放入None
+        self._batch_queue: Optional[queue.Queue] = None
         
-    def start_scan(self, scan_paths=None, exclude_paths=None) -> str:
+    def start_scan(self, scan_paths=None, exclude_paths=None, batch_queue: Optional[queue.Queue] = None) -> str:
         """启动新的扫描任务
         
         Args:
             scan_paths: 要扫描的路径列表，如果为None则使用配置中的默认路径
             exclude_paths: 要排除的路径列表，如果为None则使用配置中的默认排除路径
+            batch_queue: 可选队列，扫描过程中按批（List[FileItem]）放入已分类的文件项，
+                扫描结束（含停止或出错）时放入None作为结束标记，供下游边扫描边处理
             
         Returns:
             扫描任务ID
@@ -60,6 +80,7 @@ class Scanner:
         self._stop_event.clear()
         self._pause_event.clear()
         self._file_hashes = {}
+        self._batch_queue = batch_queue
         
         # 如果未提供路径，则使用配置中的默认路径
         if scan_paths is None:
@@ -90,6 +111,7 @@ class Scanner:
         )
         
         # 启动扫描线程
+        self._scan_done.clear()
         self._is_scanning = True
         self._scan_thread = threading.Thread(
             target=self._scan_worker, 
@@ -133,6 +155,7 @@ class Scanner:
             self.current_scan.is_complete = False  # 标记为非正常完成
         
         self._is_scanning = False
+        self._scan_done.set()
         logger.info("扫描任务已停止")
         return True
     
@@ -194,6 +217,17 @@ class Scanner:
         """检查扫描器是否正在扫描"""
         return self._is_scanning
 
+    def wait_until_done(self, timeout: Optional[float] = None) -> bool:
+        """等待当前扫描结束
+
+        Args:
+            timeout: 最长等待秒数，None表示一直等待
+
+        Returns:
+            扫描是否已结束（超时返回False）
+        """
+        return self._scan_done.wait(timeout)
+
     def get_current_result(self) -> Optional[ScanResult]:
         """获取当前扫描结果
         
@@ -242,6 +276,8 @@ class Scanner:
     
     def _process_worker(self):
         """文件处理工作线程，处理扫描到的文件信息"""
+        batch_queue = self._batch_queue
+        batch: List[FileItem] = []
         try:
             while not self._stop_event.is_set():
                 # 检查是否需要暂停
@@ -277,7 +313,13 @@ class Scanner:
                         
                     # Calculate and store hash for duplicate detection (only for regular files)
                     if file_item.type == FileType.REGULAR:
-                        self._calculate_and_store_hash(file_item)
+                        self._calculate_and_store_hash(file_item, file_stat)
+
+                    if batch_queue is not None:
+                        batch.append(file_item)
+                        if len(batch) >= STREAM_BATCH_SIZE:
+                            batch_queue.put(batch)
+                            batch = []
                 # 处理完每个文件后增加延迟，便于测试暂停/停止
                 if self.process_delay > 0:
                     time.sleep(self.process_delay)
@@ -298,7 +340,12 @@ class Scanner:
         except Exception as e:
             logger.exception(f"文件处理过程出错: {e}")
         finally:
+            if batch_queue is not None:
+                if batch:
+                    batch_queue.put(batch)
+                batch_queue.put(None)
             self._is_scanning = False
+            self._scan_done.set()
     
     def _walk_directory(self, root_path: str, exclude_paths: List[str]) -> Generator[Tuple[str, os.stat_result], None, None]:
         """遍历目录并生成文件路径和状态
@@ -383,14 +430,14 @@ class Scanner:
                         continue
                     except Exception as e:
                         # 捕获其他意外异常
-                        logger.error(f"遍历目录项时发生意外错误 {entry.path}: {e}", exc_info=True)
+                        logger.opt(exception=True).error(f"遍历目录项时发生意外错误 {entry.path}: {e}")
                         continue # 继续处理下一个目录项
                     
             except (PermissionError, OSError) as e:
                 logger.debug(f"无法访问目录 {current_path}: {e}")
             except Exception as e:
                  # 捕获 os.scandir 以外的意外异常
-                 logger.error(f"扫描目录时发生意外错误 {current_path}: {e}", exc_info=True) # Add logging with exc_info
+                 logger.opt(exception=True).error(f"扫描目录时发生意外错误 {current_path}: {e}") # Add logging with traceback
         
         # 开始遍历
         logger.debug(f"开始遍历根路径: {root_path}")
@@ -454,10 +501,8 @@ class Scanner:
             is_readonly = False
             try:
                 if os.name == 'nt':
-                    import ctypes
-                    FILE_ATTRIBUTE_READONLY = 0x01
-                    attrs = ctypes.windll.kernel32.GetFileAttributesW(str(file_path))
-                    if attrs != -1 and (attrs & FILE_ATTRIBUTE_READONLY):
+                    # Windows下stat结果已带文件属性，无需再调用GetFileAttributesW
+                    if file_stat.st_file_attributes & stat.FILE_ATTRIBUTE_READONLY:
                         is_readonly = True
                 else:
                     if not os.access(file_path, os.W_OK):
@@ -564,14 +609,45 @@ class Scanner:
             logger.error(f"计算文件哈希值时出错 {file_path}: {e}")
             return None
 
-    def _calculate_and_store_hash(self, file_item: FileItem):
-        """计算并存储文件哈希值"""
+    @classmethod
+    def clear_hash_cache(cls):
+        """清空文件内容哈希缓存，释放内存"""
+        with cls._hash_cache_lock:
+            cls._hash_cache.clear()
+
+    def _cached_file_hash(self, file_path: str, file_stat: Optional[os.stat_result]) -> Optional[str]:
+        """获取文件哈希值，文件的inode、修改时间和大小都未变化时复用缓存结果"""
+        if file_stat is None:
+            return self._calculate_file_hash(file_path)
+        key = (file_path, file_stat.st_ino, file_stat.st_mtime_ns, file_stat.st_size)
+        cache = Scanner._hash_cache
+        with Scanner._hash_cache_lock:
+            file_hash = cache.get(key)
+            if file_hash is not None:
+                cache.move_to_end(key)
+                return file_hash
+        file_hash = self._calculate_file_hash(file_path)
+        # 计算失败或被中断时不缓存
+        if file_hash is not None:
+            with Scanner._hash_cache_lock:
+                cache[key] = file_hash
+                if len(cache) > HASH_CACHE_MAX_ENTRIES:
+                    cache.popitem(last=False)
+        return file_hash
+
+    def _calculate_and_store_hash(self, file_item: FileItem, file_stat: Optional[os.stat_result] = None):
+        """计算并存储文件哈希值
+
+        Args:
+            file_item: 文件项
+            file_stat: 扫描时获取的文件状态，提供时用于命中哈希缓存
+        """
         # Skip very small files or based on config
         min_size = self.config.get('scanner.duplicate_min_size_mb', 1) * 1024 * 1024
         if file_item.size < min_size:
             return
             
-        file_hash = self._calculate_file_hash(file_item.path)
+        file_hash = self._cached_file_hash(file_item.path, file_stat)
         
         if file_hash:
             with self._file_hashes_lock:
@@ -4,9 +4,15 @@
 数据库接口 - 处理应用数据的持久化和检索
 """
 import os
+import json
 import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from data.models import CleanTask, ScanResult
 
 class Database:
     """数据库管理类"""
@@ -17,25 +23,280 @@ class Database:
             db_path = db_dir / "cleaner.db"
         self.db_path = str(db_path)
         self.conn = None
+        # 所有线程共用同一个连接，事务状态也是连接级的：读写连接都需持有该锁；
+        # batch() 期间锁一直由发起批量的线程持有，其他线程的读写会等待批量提交后再进行
+        self._lock = threading.RLock()
+        # batch() 嵌套深度，仅在持有锁时读写
+        self._batch_depth = 0
         self.init_database()
 
     def init_database(self):
         self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
         self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.execute("PRAGMA synchronous=NORMAL;")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS logs ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, level TEXT, "
+            "message TEXT, module TEXT, function TEXT, task_id TEXT)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS clean_tasks ("
+            "task_id TEXT PRIMARY KEY, name TEXT, scan_id TEXT, created_time TEXT, status TEXT, "
+            "total_size INTEGER, cleaned_size INTEGER, backup_id TEXT, data TEXT)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS scan_results ("
+            "scan_id TEXT PRIMARY KEY, start_time TEXT, end_time TEXT, total_items INTEGER, "
+            "total_size INTEGER, is_complete INTEGER, data TEXT)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_scan_results_start ON scan_results(start_time DESC)"
+        )
+        # 历史列表按 (created_time, task_id) 倒序做键集分页
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_clean_tasks_created "
+            "ON clean_tasks(created_time DESC, task_id DESC)"
+        )
         self.conn.commit()
 
+    def _commit(self):
+        """提交当前事务，处于 batch() 中时推迟到批量结束（调用方需持有锁）"""
+        if self._batch_depth == 0:
+            self.conn.commit()
+
+    @contextmanager
+    def batch(self) -> Iterator["Database"]:
+        """批量写入上下文，块内的写操作合并为一次提交
+
+        块内一直持有连接锁，其他线程的读写会等待，因此只应包住连续的几次写入，
+        不要在块内等待扫描、清理等耗时操作。可嵌套，最外层退出时提交；块内抛出异常时回滚。
+
+        Yields:
+            数据库实例本身，写操作照常调用即可
+        """
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._batch_depth -= 1
+                if self._batch_depth == 0 and self.conn:
+                    self.conn.rollback()
+                raise
+            else:
+                self._batch_depth -= 1
+                if self._batch_depth == 0 and self.conn:
+                    self.conn.commit()
+
     def execute(self, sql: str, params: tuple = ()): 
-        cur = self.conn.cursor()
-        cur.execute(sql, params)
-        self.conn.commit()
-        return cur
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute(sql, params)
+            self._commit()
+            return cur
 
     def query(self, sql: str, params: tuple = ()): 
-        cur = self.conn.cursor()
-        cur.execute(sql, params)
-        return cur.fetchall()
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute(sql, params)
+            return cur.fetchall()
+
+    def save_logs(self, records: list):
+        """批量写入日志记录
+
+        Args:
+            records: (timestamp, level, message, module, function, task_id) 元组列表
+        """
+        if not records:
+            return
+        with self._lock:
+            self.conn.executemany(
+                "INSERT INTO logs (timestamp, level, message, module, function, task_id) VALUES (?, ?, ?, ?, ?, ?)",
+                records
+            )
+            self._commit()
+
+    def clear_logs(self, days: int, batch_size: int = 1000) -> int:
+        """删除指定天数之前的日志记录
+
+        分批删除并逐批提交，避免长时间占用写锁阻塞并发的日志写入
+
+        Args:
+            days: 保留天数
+            batch_size: 每批删除的记录数
+
+        Returns:
+            删除的记录数
+        """
+        cutoff = (datetime.now().astimezone() - timedelta(days=days)).isoformat()
+        total = 0
+        while True:
+            with self._lock:
+                cur = self.conn.execute(
+                    "DELETE FROM logs WHERE id IN (SELECT id FROM logs WHERE timestamp < ? LIMIT ?)",
+                    (cutoff, batch_size)
+                )
+                self._commit()
+            total += cur.rowcount
+            if cur.rowcount < batch_size:
+                return total
+
+    def save_scan_result(self, result: ScanResult) -> bool:
+        """保存（插入或更新）扫描结果
+
+        Args:
+            result: 扫描结果
+
+        Returns:
+            是否保存成功
+        """
+        data = json.dumps(result.dict(), ensure_ascii=False, default=str)
+        end_time = result.end_time.isoformat(timespec="microseconds") if result.end_time else None
+        try:
+            self.execute(
+                "INSERT OR REPLACE INTO scan_results "
+                "(scan_id, start_time, end_time, total_items, total_size, is_complete, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (result.scan_id, result.start_time.isoformat(timespec="microseconds"), end_time,
+                 result.total_items, result.total_size, int(result.is_complete), data)
+            )
+        except sqlite3.Error:
+            return False
+        return True
+
+    def get_scan_result(self, scan_id: str) -> Optional[ScanResult]:
+        """按ID获取扫描结果
+
+        Args:
+            scan_id: 扫描ID
+
+        Returns:
+            扫描结果，不存在时返回None
+        """
+        rows = self.query("SELECT data FROM scan_results WHERE scan_id = ?", (scan_id,))
+        if not rows:
+            return None
+        return ScanResult(**json.loads(rows[0][0]))
+
+    def list_scan_results(self, limit: int = 10, offset: int = 0) -> List[Dict[str, Any]]:
+        """按开始时间倒序列出扫描结果摘要（不含文件列表）
+
+        Args:
+            limit: 结果数量限制
+            offset: 结果偏移量
+
+        Returns:
+            扫描结果摘要列表
+        """
+        rows = self.query(
+            "SELECT scan_id, start_time, end_time, total_items, total_size, is_complete "
+            "FROM scan_results ORDER BY start_time DESC LIMIT ? OFFSET ?",
+            (limit, offset)
+        )
+        return [
+            {
+                "scan_id": scan_id,
+                "start_time": datetime.fromisoformat(start_time),
+                "end_time": datetime.fromisoformat(end_time) if end_time else None,
+                "total_items": total_items,
+                "total_size": total_size,
+                "is_complete": bool(is_complete),
+            }
+            for scan_id, start_time, end_time, total_items, total_size, is_complete in rows
+        ]
+
+    def delete_scan_result(self, scan_id: str) -> bool:
+        """删除扫描结果
+
+        Args:
+            scan_id: 扫描ID
+
+        Returns:
+            是否删除了记录
+        """
+        cur = self.execute("DELETE FROM scan_results WHERE scan_id = ?", (scan_id,))
+        return cur.rowcount > 0
+
+    def save_clean_task(self, task: CleanTask):
+        """保存（插入或更新）清理任务
+
+        Args:
+            task: 清理任务
+        """
+        data = json.dumps(task.dict(), ensure_ascii=False, default=str)
+        self.execute(
+            "INSERT OR REPLACE INTO clean_tasks "
+            "(task_id, name, scan_id, created_time, status, total_size, cleaned_size, backup_id, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (task.task_id, task.name, task.scan_id, task.created_time.isoformat(timespec="microseconds"),
+             task.status, task.total_size, task.cleaned_size, task.backup_id, data)
+        )
+
+    def get_clean_task(self, task_id: str) -> Optional[CleanTask]:
+        """按ID获取清理任务
+
+        Args:
+            task_id: 任务ID
+
+        Returns:
+            清理任务，不存在时返回None
+        """
+        rows = self.query("SELECT data FROM clean_tasks WHERE task_id = ?", (task_id,))
+        if not rows:
+            return None
+        return CleanTask(**json.loads(rows[0][0]))
+
+    def list_clean_tasks(self, limit: int = 10, cursor: Optional[Tuple[str, str]] = None) -> Dict[str, Any]:
+        """按创建时间倒序列出清理任务摘要（键集分页）
+
+        不使用OFFSET：从上一页最后一条的 (created_time, task_id) 之后继续读取，
+        借助索引直接定位，翻到很深的页也只读取limit条。
+
+        Args:
+            limit: 每页数量
+            cursor: 上一页返回的next_cursor，None表示第一页
+
+        Returns:
+            {"items": 任务摘要列表, "next_cursor": 下一页游标，没有更多时为None}
+        """
+        sql = ("SELECT task_id, name, scan_id, created_time, status, total_size, cleaned_size, backup_id "
+               "FROM clean_tasks")
+        params: tuple = ()
+        if cursor:
+            sql += " WHERE (created_time, task_id) < (?, ?)"
+            params = tuple(cursor)
+        sql += " ORDER BY created_time DESC, task_id DESC LIMIT ?"
+        rows = self.query(sql, params + (limit,))
+        items: List[Dict[str, Any]] = [
+            {
+                "task_id": task_id,
+                "name": name,
+                "scan_id": scan_id,
+                "created_time": datetime.fromisoformat(created_time),
+                "status": status,
+                "total_size": total_size,
+                "cleaned_size": cleaned_size,
+                "backup_id": backup_id,
+            }
+            for task_id, name, scan_id, created_time, status, total_size, cleaned_size, backup_id in rows
+        ]
+        next_cursor = (rows[-1][3], rows[-1][0]) if len(rows) == limit else None
+        return {"items": items, "next_cursor": next_cursor}
+
+    def delete_clean_task(self, task_id: str) -> bool:
+        """删除清理任务
+
+        Args:
+            task_id: 任务ID
+
+        Returns:
+            是否删除了记录
+        """
+        cur = self.execute("DELETE FROM clean_tasks WHERE task_id = ?", (task_id,))
+        return cur.rowcount > 0
 
     def close(self):
-        if self.conn:
-            self.conn.close()
-            self.conn = None
\ No newline at end of file
+        with self._lock:
+            if self.conn:
+                self.conn.close()
+                self.conn = None
\ No newline at end of file
@@ -6,7 +6,7 @@ Services module initialization
 """
 
 from .task_manager import TaskManager
-from .logger import LoggerService
+from .logger import LoggerService, get_logger_service
 from .scheduler import SchedulerService
 
-__all__ = ['TaskManager', 'LoggerService', 'SchedulerService']
\ No newline at end of file
+__all__ = ['TaskManager', 'LoggerService', 'get_logger_service', 'SchedulerService']
\ No newline at end of file
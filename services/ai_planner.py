@@ -8,23 +8,302 @@ AI Planner Service - 与多种AI模型交互生成清理策略
 
 import requests
 import os
+import asyncio
 import re
 import json
 import time
+import hashlib
+import copy
+import functools
+import socket
 import urllib3
-from typing import Dict, Any, Optional, List, Tuple, Literal
-import getpass
+from urllib3.connection import HTTPConnection
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Tuple, Literal, Final
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # orjson为可选加速依赖
+    orjson = None
+
+try:
+    import uvloop
+except ImportError:  # uvloop为可选加速依赖，Windows下不可用
+    uvloop = None
+
 from config.manager import ConfigManager
 from loguru import logger as loguru_logger # Use loguru directly for fallback and __main__
 
 # 禁用SSL警告
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# generate_plan 结果缓存有效期（秒）与最大条目数
+PLAN_CACHE_TTL = 3600
+PLAN_CACHE_MAXSIZE = 128
+
+# generate_plans 同时进行的计划请求上限（兼顾模型API限流）
+PLAN_CONCURRENCY = 8
+
+# 网络环境检测结果在进程内的复用有效期（秒）
+NETWORK_CACHE_TTL = 60
+# 网络环境检测结果落盘后的复用有效期（秒），跨进程启动时免去重复探测
+NETWORK_DISK_CACHE_TTL = 600
+
+# 模型回复中提取JSON用的正则（模块加载时编译一次）
+_CODE_FENCE_RE = re.compile(r"^```json|^```|```$", re.IGNORECASE)
+_JSON_CANDIDATE_RE = re.compile(r"(\{[\s\S]*\}|\[[\s\S]*\])")
+
+# 安全性分流标记的系统提示词（静态模板，模块加载时构建一次）
+_SAFETY_SYSTEM_PROMPT: Final[str] = (
+    "你会收到一组已扫描的绝对路径（如：['C:\\Users\\xxx\\Downloads\\abc.zip', 'C:\\Windows\\Temp']），"
+    "请只对这些路径做如下标记：safe（可自动清理）、confirm（需人工确认）、forbid（禁止清理）。"
+    "输出格式如下：\n"
+    "[{\"path\": \"C:\\Users\\xxx\\Downloads\\abc.zip\", \"safety\": \"confirm\", \"reason\": \"大文件，建议人工确认\"}, ...]\n"
+    "禁止生成新的路径，只能对输入的路径做标记。"
+)
+
+_SAFETY_SYSTEM_MESSAGE: Final[Dict[str, str]] = {"role": "system", "content": _SAFETY_SYSTEM_PROMPT}
+_SAFETY_PATHS_PREFIX: Final[str] = "请对以下路径做分流标记："
+_USER_GOAL_PREFIX: Final[str] = "用户目标："
+_EXTRA_CONTEXT_PREFIX: Final[str] = "补充上下文："
+
+# 所有模型都不可用时的闲聊兜底回复
+_CHAT_FALLBACK_REPLY: Final[str] = "我是你的磁盘清理智能助手，可以帮你生成和执行清理计划，也能和你闲聊。"
+
+# API 主机与端点
+QWEN_HOST = "https://dashscope.aliyuncs.com"
+GEMINI_HOST = "https://generativelanguage.googleapis.com"
+QWEN_BASE_URL = f"{QWEN_HOST}/api/v1/services/aigc/text-generation/generation"
+GEMINI_BASE_URL = f"{GEMINI_HOST}/v1beta/models/{{}}:generateContent"
+
+# Gemini 请求参数
+GEMINI_ROLE_MAP = {"system": "user"}
+GEMINI_GENERATION_CONFIG = {
+    "temperature": 0.7,
+    "topK": 40,
+    "topP": 0.95,
+    "maxOutputTokens": 1024,
+}
+
+
+# 模型API限流/服务端错误的重试策略：带随机抖动的指数退避并遵循Retry-After；
+# 连接失败不重试，保证网络探测快速返回；读取超时不重试，
+# 请求已发出后模型可能仍在生成，重发POST会重复消耗一次生成调用
+_API_RETRY_OPTIONS = dict(
+    total=3,
+    connect=0,
+    read=0,
+    backoff_factor=1.0,
+    status_forcelist=[429, 500, 502, 503, 504],
+    allowed_methods=frozenset(["POST", "GET"]),
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+try:
+    _API_RETRY = Retry(backoff_jitter=0.5, **_API_RETRY_OPTIONS)
+except TypeError:  # urllib3<2.0 不支持backoff_jitter
+    _API_RETRY = Retry(**_API_RETRY_OPTIONS)
+
+
+# 显式关闭Nagle算法（小请求立即发出），并开启TCP keepalive以及时发现连接池中失效的长连接
+_SOCKET_OPTIONS = [
+    *HTTPConnection.default_socket_options,
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+]
+if (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1) not in _SOCKET_OPTIONS:
+    _SOCKET_OPTIONS.append((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1))
+
+
+class _SocketOptionsAdapter(HTTPAdapter):
+    """为连接池设置自定义socket选项的HTTPAdapter"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs.setdefault("socket_options", _SOCKET_OPTIONS)
+        super().init_poolmanager(*args, **kwargs)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        proxy_kwargs.setdefault("socket_options", _SOCKET_OPTIONS)
+        return super().proxy_manager_for(proxy, **proxy_kwargs)
+
+
+def _new_session() -> requests.Session:
+    """创建带连接池的长连接session，同一主机的请求复用TCP/TLS连接"""
+    session = requests.Session()
+    session.verify = False  # 允许不验证SSL证书
+    session.headers["Connection"] = "keep-alive"
+    session.headers["Content-Type"] = "application/json"
+    adapter = _SocketOptionsAdapter(pool_connections=4, pool_maxsize=20, pool_block=False, max_retries=_API_RETRY)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _proxy_env_key() -> Tuple[Tuple[str, str], ...]:
+    """当前进程中与代理相关的环境变量快照，用作系统代理缓存的键"""
+    return tuple(sorted((k, v) for k, v in os.environ.items() if k.lower().endswith("_proxy")))
+
+
+@functools.lru_cache(maxsize=8)
+def _cached_system_proxies(env_key: Tuple[Tuple[str, str], ...]) -> Dict[str, str]:
+    """解析系统代理（Windows下还会读取注册表），按代理环境变量快照缓存"""
+    return requests.utils.get_environ_proxies("https://www.google.com")
+
+
+def _system_proxies() -> Dict[str, str]:
+    """获取访问外网使用的系统代理，代理环境变量未变化时复用解析结果"""
+    return dict(_cached_system_proxies(_proxy_env_key()))
+
+
+def _loads_json(data: Any) -> Any:
+    """解析JSON文本或字节，优先使用orjson"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dumps_json_bytes(obj: Any) -> bytes:
+    """将请求体序列化为UTF-8编码的JSON字节，优先使用orjson"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def _qwen_output_text(result: Dict[str, Any]) -> str:
+    """从Qwen（DashScope）响应中取出回复文本，兼容message与text两种结果格式"""
+    output = result.get("output") or {}
+    choices = output.get("choices")
+    if isinstance(choices, list) and choices:
+        text = choices[0].get("message", {}).get("content", "")
+    else:
+        text = output.get("text", "")
+    return text if isinstance(text, str) else ""
+
+
+def _gemini_output_text(result: Dict[str, Any]) -> str:
+    """从Gemini generateContent响应中取出第一个候选的文本"""
+    candidates = result.get("candidates") or []
+    if not candidates:
+        return ""
+    parts = candidates[0].get("content", {}).get("parts") or []
+    if parts and isinstance(parts[0].get("text"), str):
+        return parts[0]["text"]
+    return ""
+
+
+def _to_gemini_contents(messages: list) -> list:
+    """将OpenAI风格的messages转换为Gemini contents（Gemini无system角色，按user处理）"""
+    return [
+        {"role": GEMINI_ROLE_MAP.get(msg["role"], msg["role"]), "parts": [{"text": msg["content"]}]}
+        for msg in messages
+    ]
+
+
+def _dumps_plan(plan: Any) -> str:
+    """将计划格式化为缩进JSON文本，优先使用orjson"""
+    if orjson is not None:
+        return orjson.dumps(plan, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(plan, indent=2, ensure_ascii=False)
+
+
+def run_planner_coroutine(coro):
+    """在独立的事件循环中运行规划协程（如 generate_plans），安装了uvloop时使用uvloop
+
+    只影响本次创建的事件循环，不修改进程全局的事件循环策略。
+
+    Args:
+        coro: 要运行的协程
+
+    Returns:
+        协程的返回值
+    """
+    loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def _is_plan_payload(value: Any) -> bool:
+    """判断解析出的JSON是否为调用方需要的结构：含steps的字典，或由字典组成的标记列表
+
+    正文中的 [1]、[注意] 等括号即使能解析也不是计划，需要跳过。
+    """
+    if isinstance(value, dict):
+        return "steps" in value
+    return isinstance(value, list) and bool(value) and all(isinstance(item, dict) for item in value)
+
+
+class _JsonBalanceScanner:
+    """增量扫描流式文本，找到第一个括号配平、可解析且为计划结构的顶层JSON"""
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._start = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> Optional[str]:
+        """追加一段文本
+
+        Returns:
+            已完整的JSON文本；尚未闭合时返回None
+        """
+        self._text += chunk
+        text = self._text
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._depth == 0:
+                if ch in "{[":
+                    self._start = i
+                    self._depth = 1
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    candidate = text[self._start:i + 1]
+                    try:
+                        parsed = _loads_json(candidate)
+                    except ValueError:
+                        # 配平但不是合法JSON（如正文中的括号），继续向后扫描
+                        continue
+                    if not _is_plan_payload(parsed):
+                        # 合法JSON但不是计划（如正文中的 [1]），继续向后扫描
+                        continue
+                    self._pos = i + 1
+                    return candidate
+        self._pos = len(text)
+        return None
+
+
+class _LeaderCancelled(Exception):
+    """合并请求的发起方被取消，等待同一结果的其他调用方应重新发起请求"""
+
+
 class AIPlannerService:
     """与多种AI模型交互生成清理策略的服务"""
 
+    # 进程内共享缓存，重复构造实例时避免重复加载密钥和探测网络
+    _api_keys_cache: Dict[tuple, Dict[str, str]] = {}
+    _network_cache: Dict[tuple, Tuple[float, Dict[str, Any]]] = {}
+
     def __init__(self, config_manager: Optional[ConfigManager] = None, model: str = "qwen", logger: Optional[Any] = None):
         """初始化AI规划服务
 
@@ -40,8 +319,20 @@ class AIPlannerService:
         self.config_manager = config_manager or ConfigManager()
         self.model = model
         self.logger = logger if logger else loguru_logger.bind(module="AIPlannerService_Fallback")
-        self.api_keys = self._load_api_keys()
-        self.network_config = self._detect_network_environment()
+        self.api_keys = self._get_api_keys()
+        # 各模型的鉴权请求头只构建一次（Content-Type/keep-alive 已设为session默认头）
+        self._qwen_headers = {"Authorization": f"Bearer {self.api_keys['qwen']}"} if self.api_keys.get("qwen") else {}
+        self._qwen_sse_headers = {**self._qwen_headers, "X-DashScope-SSE": "enable"}
+        self._gemini_headers = {"x-goog-api-key": self.api_keys.get("gemini", "")}
+        # 网络检测未给出可用session时的兜底session，每个模型一个，重复使用
+        self._sessions: Dict[str, requests.Session] = {}
+        # 探测到的Gemini (版本, 模型, 请求URL) 列表，首次成功探测后复用
+        self._gemini_endpoints: Optional[List[Tuple[str, str, str]]] = None
+        # generate_plan 结果LRU缓存: {key: (写入时间, 计划JSON文本)}
+        self._plan_cache: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        # agenerate_plan 进行中的请求: {key: Future}，相同请求合并为一次调用
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.network_config = self._get_network_config()
         # 推荐优先级列表
         self.model_priority = {
             "qwen": ["qwen-max", "qwen-turbo", "qwen-plus"],
@@ -61,8 +352,8 @@ class AIPlannerService:
         self.model_name = self._auto_select_model_name(self.current_model)
         self.logger.info(f"AI Planner Service 成功初始化，使用{self.current_model}的{self.model_name}模型。")
         self.api_urls = {
-            "gemini": "https://generativelanguage.googleapis.com/v1beta/models/{}:generateContent",
-            "qwen": "https://dashscope.aliyuncs.com/api/v1/services/aigc/text-generation/generation"
+            "gemini": GEMINI_BASE_URL,
+            "qwen": QWEN_BASE_URL
         }
         
         if self.api_key:
@@ -70,28 +361,55 @@ class AIPlannerService:
         else:
             self.logger.error(f"未找到任何可用的API密钥。AI Planner Service将无法正常工作。")
 
+    def _get_api_keys(self) -> Dict[str, str]:
+        """获取API密钥，密钥来源未变化时复用进程内已加载的结果"""
+        gemini_env = os.getenv("GEMINI_API_KEY")
+        qwen_env = os.getenv("QWEN_API_KEY")
+        ai_config = {}
+        if not (gemini_env and qwen_env):
+            # 环境变量未提供全部密钥时，配置文件中的密钥才会生效
+            config = self.config_manager.get_config() if hasattr(self.config_manager, 'get_config') else None
+            ai_config = config.get("ai") if isinstance(config, dict) else None
+            if not isinstance(ai_config, dict):
+                ai_config = {}
+        fingerprint = (
+            gemini_env,
+            qwen_env,
+            ai_config.get("gemini_api_key"),
+            ai_config.get("qwen_api_key"),
+        )
+        cached = AIPlannerService._api_keys_cache.get(fingerprint)
+        if cached is None:
+            cached = self._load_api_keys()
+            AIPlannerService._api_keys_cache[fingerprint] = cached
+        return dict(cached)
+
     def _load_api_keys(self) -> Dict[str, str]:
         """从环境变量或配置文件加载所有支持的AI模型API密钥"""
         api_keys = {}
-        self.logger.info("开始加载AI模型API密钥...")
+        self.logger.debug("开始加载AI模型API密钥...")
         # 尝试从环境变量加载
         gemini_env = os.getenv("GEMINI_API_KEY")
         qwen_env = os.getenv("QWEN_API_KEY")
-        self.logger.info(f"环境变量 GEMINI_API_KEY: {'已设置' if gemini_env else '未设置'}")
-        self.logger.info(f"环境变量 QWEN_API_KEY: {'已设置' if qwen_env else '未设置'}")
+        self.logger.debug("环境变量 GEMINI_API_KEY: {}", '已设置' if gemini_env else '未设置')
+        self.logger.debug("环境变量 QWEN_API_KEY: {}", '已设置' if qwen_env else '未设置')
         if gemini_env:
             api_keys["gemini"] = gemini_env
-            self.logger.info("从环境变量加载了Gemini API密钥")
+            self.logger.debug("从环境变量加载了Gemini API密钥")
         if qwen_env:
             api_keys["qwen"] = qwen_env
-            self.logger.info("从环境变量加载了Qwen API密钥")
+            self.logger.debug("从环境变量加载了Qwen API密钥")
+        if gemini_env and qwen_env:
+            # 环境变量已提供全部密钥，无需再读取配置文件
+            self.logger.info(f"成功加载的API模型: {list(api_keys.keys())}")
+            return api_keys
         # 尝试从配置文件加载
         try:
             if not self.config_manager or not hasattr(self.config_manager, 'get_config'):
                 self.logger.error("配置管理器未初始化或无get_config方法，无法从配置文件加载API密钥")
                 raise ValueError("配置管理器未初始化")
             config = self.config_manager.get_config()
-            self.logger.info(f"配置文件加载状态: {'成功' if config else '失败'}")
+            self.logger.debug("配置文件加载状态: {}", '成功' if config else '失败')
             if not config or not isinstance(config, dict):
                 self.logger.error("配置管理器返回了空配置或非字典")
                 raise ValueError("配置为空")
@@ -99,27 +417,25 @@ class AIPlannerService:
             ai_config = {} # Initialize with empty dict
             if 'ai' not in config:
                 self.logger.error("配置中不存在'ai'字段。AI Planner功能可能因此受限或不可用。")
-                self.logger.info(f"已加载的配置文件的顶层包含以下字段: {list(config.keys())}")
+                self.logger.debug("已加载的配置文件的顶层包含以下字段: {}", list(config.keys()))
                 # ai_config remains empty, subsequent .get calls on it will return None or default
             else:
                 ai_config = config.get("ai", {}) # If 'ai' exists, get it
-            self.logger.info(f"AI配置字段: {list(ai_config.keys()) if ai_config else '空'}")
+            self.logger.debug("AI配置字段: {}", list(ai_config.keys()) if ai_config else '空')
             
             # 检查各API密钥是否存在
             gemini_key = ai_config.get('gemini_api_key')
             qwen_key = ai_config.get('qwen_api_key')
-            self.logger.info(f"配置文件中 gemini_api_key: {'已设置' if gemini_key else '未设置'}")
-            self.logger.info(f"配置文件中 qwen_api_key: {'已设置' if qwen_key else '未设置'}")
+            self.logger.debug("配置文件中 gemini_api_key: {}", '已设置' if gemini_key else '未设置')
+            self.logger.debug("配置文件中 qwen_api_key: {}", '已设置' if qwen_key else '未设置')
             if gemini_key and "gemini" not in api_keys:
                 api_keys["gemini"] = gemini_key
-                self.logger.info("从配置文件加载了Gemini API密钥")
+                self.logger.debug("从配置文件加载了Gemini API密钥")
             if qwen_key and "qwen" not in api_keys:
                 api_keys["qwen"] = qwen_key
-                self.logger.info("从配置文件加载了Qwen API密钥")
+                self.logger.debug("从配置文件加载了Qwen API密钥")
         except Exception as e:
-            self.logger.error(f"无法从配置文件加载API密钥: {e}")
-            import traceback
-            self.logger.error(f"错误详情: {traceback.format_exc()}")
+            self.logger.opt(exception=True).error(f"无法从配置文件加载API密钥: {e}")
             
         if not api_keys:
             self.logger.error("在环境变量或配置文件中未找到任何API密钥")
@@ -177,10 +493,14 @@ class AIPlannerService:
     def refresh_network_config(self):
         """重新检测网络环境配置（仅做提示，不影响实际调用）"""
         self.logger.info("重新检测网络环境...（仅做提示，不影响实际调用）")
-        self.network_config = self._detect_network_environment()
+        self.network_config = self._get_network_config(force=True)
         self.logger.info(f"网络环境检测结果: {self.network_config}")
         # 不再自动切换模型
 
+    async def arefresh_network_config(self):
+        """异步重新检测网络环境，探测在线程中进行，不阻塞事件循环"""
+        await asyncio.get_running_loop().run_in_executor(None, self.refresh_network_config)
+
     def auto_switch_model_by_network(self):
         """根据当前网络环境自动切换可用AI模型（仅做提示，不影响实际调用）"""
         self.logger.info("自动切换模型功能已禁用，始终允许用户选择模型。当前模型: %s" % self.current_model)
@@ -208,36 +528,21 @@ class AIPlannerService:
             plan["steps"] = plan.pop("plan")
         return plan
 
-    def generate_safety_labels(self, candidate_paths: list, user_goal: str = None, extra_context: dict = None) -> list:
-        """让AI对已扫描路径做安全性分流标记（safe/confirm/forbid）"""
-        system_prompt = {
-            "role": "system",
-            "content": (
-                "你会收到一组已扫描的绝对路径（如：['C:\\Users\\xxx\\Downloads\\abc.zip', 'C:\\Windows\\Temp']），"
-                "请只对这些路径做如下标记：safe（可自动清理）、confirm（需人工确认）、forbid（禁止清理）。"
-                "输出格式如下：\n"
-                "[{\"path\": \"C:\\Users\\xxx\\Downloads\\abc.zip\", \"safety\": \"confirm\", \"reason\": \"大文件，建议人工确认\"}, ...]\n"
-                "禁止生成新的路径，只能对输入的路径做标记。"
-            )
-        }
-        user_prompt = {"role": "user", "content": f"请对以下路径做分流标记：{json.dumps(candidate_paths, ensure_ascii=False)}"}
-        messages = [system_prompt, user_prompt]
+    def _build_safety_messages(self, candidate_paths: list, user_goal: str = None, extra_context: dict = None) -> list:
+        """构建安全性分流标记的多轮对话消息"""
+        user_prompt = {"role": "user", "content": _SAFETY_PATHS_PREFIX + json.dumps(candidate_paths, ensure_ascii=False)}
+        messages = [_SAFETY_SYSTEM_MESSAGE, user_prompt]
         if user_goal:
-            messages.append({"role": "user", "content": f"用户目标：{user_goal}"})
+            messages.append({"role": "user", "content": _USER_GOAL_PREFIX + user_goal})
         if extra_context:
-            messages.append({"role": "system", "content": f"补充上下文：{json.dumps(extra_context, ensure_ascii=False)}"})
-        # 只用当前模型一次
-            if self.current_model == "gemini":
-                plan = self._generate_plan_with_gemini_multi(messages)
-            elif self.current_model == "qwen":
-                plan = self._generate_plan_with_qwen_multi(messages)
-            else:
-                self.logger.error(f"不支持的模型: {self.current_model}")
-            return []
-        # 解析AI输出
+            messages.append({"role": "system", "content": _EXTRA_CONTEXT_PREFIX + json.dumps(extra_context, ensure_ascii=False)})
+        return messages
+
+    def _parse_safety_labels(self, plan: Any) -> list:
+        """解析AI分流输出为标记列表"""
         try:
             if isinstance(plan, str):
-                plan = json.loads(plan)
+                plan = _loads_json(plan)
             if isinstance(plan, list):
                 return plan
             if isinstance(plan, dict) and 'steps' in plan:
@@ -246,16 +551,62 @@ class AIPlannerService:
             self.logger.error(f"AI分流输出解析失败: {e}")
         return []
 
+    def generate_safety_labels(self, candidate_paths: list, user_goal: str = None, extra_context: dict = None) -> list:
+        """让AI对已扫描路径做安全性分流标记（safe/confirm/forbid）"""
+        messages = self._build_safety_messages(candidate_paths, user_goal, extra_context)
+        # 只用当前模型一次
+        if self.current_model == "gemini":
+            plan = self._generate_plan_with_gemini_multi(messages)
+        elif self.current_model == "qwen":
+            plan = self._generate_plan_with_qwen_multi(messages)
+        else:
+            self.logger.error(f"不支持的模型: {self.current_model}")
+            return []
+        # 解析AI输出
+        return self._parse_safety_labels(plan)
+
+    def _plan_cache_key(self, user_goal: Optional[str], current_context: Optional[Dict[str, Any]], conversation_history: Optional[List[Dict[str, str]]] = None) -> str:
+        """根据用户目标、上下文和对话历史计算计划缓存键"""
+        raw = json.dumps((user_goal, current_context, conversation_history), sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.blake2b(raw.encode("utf-8")).hexdigest()
+
+    def _get_cached_plan(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取未过期的缓存计划，每次返回独立副本，调用方可放心修改"""
+        cached = self._plan_cache.get(key)
+        if cached is None:
+            return None
+        if time.monotonic() - cached[0] >= PLAN_CACHE_TTL:
+            del self._plan_cache[key]
+            return None
+        self._plan_cache.move_to_end(key)
+        self.logger.debug("命中计划缓存")
+        return _loads_json(cached[1])
+
+    def _put_cached_plan(self, key: str, plan: Dict[str, Any]):
+        """写入计划缓存，超出容量时淘汰最久未使用的条目"""
+        self._plan_cache[key] = (time.monotonic(), json.dumps(plan, ensure_ascii=False))
+        self._plan_cache.move_to_end(key)
+        while len(self._plan_cache) > PLAN_CACHE_MAXSIZE:
+            self._plan_cache.popitem(last=False)
+
+    def invalidate_plan_cache(self):
+        """清空计划缓存（上下文发生实质变化时调用）"""
+        self._plan_cache.clear()
+
     def generate_plan(self, user_goal: str = None, current_context: Optional[Dict[str, Any]] = None, conversation_history: Optional[List[Dict[str, str]]] = None) -> Optional[Dict[str, Any]]:
+        """带LRU/TTL缓存的计划生成，相同目标、上下文和对话历史在有效期内直接返回缓存结果"""
+        key = self._plan_cache_key(user_goal, current_context, conversation_history)
+        cached = self._get_cached_plan(key)
+        if cached is not None:
+            return cached
+        plan = self._generate_plan_uncached(user_goal, current_context, conversation_history)
+        if isinstance(plan, dict) and "error" not in plan:
+            self._put_cached_plan(key, plan)
+        return plan
+
+    def _generate_plan_uncached(self, user_goal: str = None, current_context: Optional[Dict[str, Any]] = None, conversation_history: Optional[List[Dict[str, str]]] = None) -> Optional[Dict[str, Any]]:
         """新版：先本地扫描候选路径，再AI分流标记，自动切换可用模型"""
-        candidate_paths = []
-        if current_context and 'scan_result' in current_context:
-            scan_result = current_context['scan_result']
-            for k in ['garbage_dirs', 'large_files', 'duplicate_images', 'blurry_images']:
-                v = scan_result.get(k, [])
-                if isinstance(v, list):
-                    candidate_paths.extend(v)
-        candidate_paths = list(set(candidate_paths))
+        candidate_paths = self._collect_candidate_paths(current_context)
         if not candidate_paths:
             self.logger.warning("未发现可分流的候选路径，返回空计划。")
             return {"error": "未发现可分流的候选路径。"}
@@ -272,6 +623,135 @@ class AIPlannerService:
                 last_error = e
                 self.logger.warning(f"模型 {model} 生成分流失败，尝试下一个模型。错误: {e}")
         # 本地兜底分流
+        safety_labels = self._local_safety_labels(candidate_paths)
+        if safety_labels:
+            return {"steps": safety_labels}
+        return {"error": f"所有AI模型均不可用。最后错误: {last_error}"}
+
+    async def _agenerate_safety_labels(self, model: str, messages: list) -> list:
+        """在线程中调用指定模型的同步接口并解析分流标记，不修改current_model，可并发执行"""
+        # asyncio.to_thread 需要Python 3.9，这里使用默认线程池执行器
+        loop = asyncio.get_running_loop()
+        if model == "gemini":
+            plan = await loop.run_in_executor(None, functools.partial(self._generate_plan_with_gemini_multi, messages))
+        elif model == "qwen":
+            plan = await loop.run_in_executor(None, functools.partial(self._generate_plan_with_qwen_multi, messages))
+        else:
+            self.logger.error(f"不支持的模型: {model}")
+            return []
+        return self._parse_safety_labels(plan)
+
+    async def agenerate_plan(self, user_goal: str = None, current_context: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """异步版generate_plan：所有可用模型并发请求，取最先返回的有效结果
+
+        Args:
+            user_goal: 用户目标
+            current_context: 当前上下文（包含scan_result）
+
+        Returns:
+            清理计划字典，格式与generate_plan一致
+        """
+        key = self._plan_cache_key(user_goal, current_context)
+        while True:
+            cached = self._get_cached_plan(key)
+            if cached is not None:
+                return cached
+            # 相同请求正在进行时直接等待其结果
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            self.logger.debug("合并进行中的相同计划请求")
+            try:
+                return copy.deepcopy(await asyncio.shield(inflight))
+            except _LeaderCancelled:
+                # 发起方被取消时本调用方并未被取消，重新检查缓存并在需要时自行发起请求
+                self.logger.debug("合并的计划请求已取消，重新发起")
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            plan = await self._agenerate_plan_uncached(key, user_goal, current_context)
+        except asyncio.CancelledError:
+            # 取消只作用于发起方自身，等待者收到 _LeaderCancelled 后重新发起
+            future.set_exception(_LeaderCancelled())
+            future.exception()  # 标记已读取，避免没有等待者时的告警
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # 标记已读取，避免没有等待者时的告警
+            raise
+        else:
+            future.set_result(plan)
+            return plan
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _agenerate_plan_uncached(self, key: str, user_goal: str = None, current_context: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """agenerate_plan的实际实现，命中结果写入计划缓存"""
+        candidate_paths = self._collect_candidate_paths(current_context)
+        if not candidate_paths:
+            self.logger.warning("未发现可分流的候选路径，返回空计划。")
+            return {"error": "未发现可分流的候选路径。"}
+        messages = self._build_safety_messages(candidate_paths, user_goal, current_context)
+        # 对冲请求：各模型同时发起，取最先返回的有效结果并取消其余任务
+        tasks = {
+            asyncio.create_task(self._agenerate_safety_labels(model, messages)): model
+            for model in self.get_available_models()
+        }
+        pending = set(tasks)
+        last_error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        self.logger.warning(f"模型 {tasks[task]} 生成分流失败。错误: {last_error}")
+                        continue
+                    safety_labels = task.result()
+                    if safety_labels:
+                        plan = {"steps": safety_labels}
+                        self._put_cached_plan(key, plan)
+                        return plan
+        finally:
+            for task in pending:
+                task.cancel()
+        # 本地兜底分流
+        safety_labels = self._local_safety_labels(candidate_paths)
+        if safety_labels:
+            return {"steps": safety_labels}
+        return {"error": f"所有AI模型均不可用。最后错误: {last_error}"}
+
+    async def generate_plans(self, goals: List[str], current_context: Optional[Dict[str, Any]] = None) -> List[Optional[Dict[str, Any]]]:
+        """并发为多个子目标生成清理计划，并发数受PLAN_CONCURRENCY限制
+
+        Args:
+            goals: 用户子目标列表
+            current_context: 各子目标共用的上下文（包含scan_result）
+
+        Returns:
+            与goals一一对应的计划列表
+        """
+        sem = asyncio.Semaphore(PLAN_CONCURRENCY)
+
+        async def _one(goal: str) -> Optional[Dict[str, Any]]:
+            async with sem:
+                return await self.agenerate_plan(goal, current_context)
+
+        return await asyncio.gather(*(_one(goal) for goal in goals))
+
+    def _collect_candidate_paths(self, current_context: Optional[Dict[str, Any]]) -> list:
+        """从上下文的扫描结果中收集去重后的候选路径"""
+        candidate_paths = []
+        if current_context and 'scan_result' in current_context:
+            scan_result = current_context['scan_result']
+            for k in ['garbage_dirs', 'large_files', 'duplicate_images', 'blurry_images']:
+                v = scan_result.get(k, [])
+                if isinstance(v, list):
+                    candidate_paths.extend(v)
+        return list(set(candidate_paths))
+
+    def _local_safety_labels(self, candidate_paths: list) -> list:
+        """AI不可用时基于路径特征的本地兜底分流"""
         safety_labels = []
         for p in candidate_paths:
             p_lower = p.lower()
@@ -290,16 +770,11 @@ class AIPlannerService:
                 safety_labels.append({"path": p, "safety": "forbid", "reason": "系统关键文件"})
             else:
                 safety_labels.append({"path": p, "safety": "confirm", "reason": "需人工确认"})
-        if safety_labels:
-            return {"steps": safety_labels}
-        return {"error": f"所有AI模型均不可用。最后错误: {last_error}"}
+        return safety_labels
 
     def _generate_plan_with_qwen_multi(self, messages: list) -> Optional[Dict[str, Any]]:
         """多轮对话风格调用Qwen"""
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
+        headers = self._qwen_sse_headers
         payload = {
             "model": "qwen-turbo",
             "input": {
@@ -307,6 +782,7 @@ class AIPlannerService:
             },
             "parameters": {
                 "result_format": "message",
+                "incremental_output": True,
                 "temperature": 0.1,
                 "max_tokens": 2000,
                 "top_p": 0.8
@@ -314,60 +790,89 @@ class AIPlannerService:
         }
         api_url = self.api_urls["qwen"]
         session = self._get_session_for_model("qwen")
+        # 请求体只序列化一次，重试时复用
+        body = _dumps_json_bytes(payload)
+        # 限流和5xx重试由session的Retry策略处理，这里只对无法解析的回复重试
         max_retries = 3
-        base_delay = 2
-        max_delay = 60
-        retry_delay = base_delay
         for attempt in range(1, max_retries + 1):
             try:
                 self.logger.info(f"向Qwen发送多轮对话 (尝试 {attempt}/{max_retries})...")
-                response = session.post(api_url, headers=headers, json=payload, timeout=(5, 30))
-                if response.status_code == 200:
-                    result = response.json()
-                    try:
-                        output = result["output"]
-                        if "choices" in output:
-                            choices = output["choices"]
-                            if not isinstance(choices, list) or len(choices) == 0:
-                                    continue
-                            message = choices[0].get("message", {})
-                            plan_text = message.get("content", "")
-                        elif "text" in output and isinstance(output["text"], str):
-                            plan_text = output["text"]
-                        else:
-                                continue
-                        if not plan_text:
-                                continue
-                        extracted_json_str = self._extract_json_from_text(plan_text)
-                        if extracted_json_str:
-                            try:
-                                plan = json.loads(extracted_json_str)
-                                self.logger.info(f"从Qwen成功接收并解析多轮计划")
-                                return plan
-                            except (json.JSONDecodeError, KeyError, ValueError):
-                                continue
-                        else:
-                            # 新增：直接返回原始文本（非清理问题时可用）
-                            return plan_text
-                    except (json.JSONDecodeError, KeyError, ValueError):
-                            continue
-                else:
+                response = session.post(api_url, headers=headers, data=body, timeout=(5, 30), stream=True)
+                if response.status_code != 200:
+                    self.logger.warning(f"Qwen API调用失败，状态码: {response.status_code}")
+                    response.close()
+                    return None
+                plan_text = self._read_qwen_stream(response)
+                if not plan_text:
                     continue
+                try:
+                    extracted_json_str = self._extract_json_from_text(plan_text)
+                    if extracted_json_str:
+                        try:
+                            plan = _loads_json(extracted_json_str)
+                            self.logger.info(f"从Qwen成功接收并解析多轮计划")
+                            return plan
+                        except (json.JSONDecodeError, KeyError, ValueError):
+                            continue
+                    else:
+                        # 新增：直接返回原始文本（非清理问题时可用）
+                        return plan_text
+                except (json.JSONDecodeError, KeyError, ValueError):
+                        continue
             except (json.JSONDecodeError, KeyError, ValueError):
                 continue
         return None
 
+    def _read_qwen_stream(self, response: requests.Response) -> str:
+        """读取Qwen的SSE流式回复，顶层JSON一旦闭合即停止读取并关闭连接
+
+        Returns:
+            完整JSON文本；流中没有完整JSON时返回拼接后的全部文本
+        """
+        scanner = _JsonBalanceScanner()
+        parts = []
+        try:
+            for line in response.iter_lines():
+                if not line.startswith(b"data:"):
+                    continue
+                delta = _qwen_output_text(_loads_json(line[5:]))
+                if not delta:
+                    continue
+                parts.append(delta)
+                complete = scanner.feed(delta)
+                if complete is not None:
+                    return complete
+        finally:
+            response.close()
+        return "".join(parts)
+
+    def _gemini_model_endpoints(self) -> List[Tuple[str, str, str]]:
+        """返回可用Gemini模型的 (版本, 模型, 请求URL) 列表，探测成功后缓存，避免每次请求都调用ListModels"""
+        if self._gemini_endpoints is not None:
+            return self._gemini_endpoints
+        detected, models = self._detect_gemini_models()
+        endpoints = [
+            (version, mname, f"{GEMINI_HOST}/{version}/models/{mname}:generateContent")
+            for version, mname in models
+        ]
+        if detected:
+            self._gemini_endpoints = endpoints
+        return endpoints
+
     def _detect_gemini_models(self):
-        """自动探测当前API Key可用的Gemini模型和API版本"""
+        """自动探测当前API Key可用的Gemini模型和API版本
+
+        Returns:
+            (是否探测成功, [(版本, 模型名), ...]) 元组，探测失败时返回兜底模型列表
+        """
         api_versions = ["v1", "v1beta"]
         available_models = []
         for version in api_versions:
-            url = f"https://generativelanguage.googleapis.com/{version}/models"
-            headers = {"x-goog-api-key": self.api_keys.get("gemini", "")}
+            url = f"{GEMINI_HOST}/{version}/models"
             try:
-                resp = requests.get(url, headers=headers, timeout=10)
+                resp = self._get_session_for_model("gemini").get(url, headers=self._gemini_headers, timeout=10)
                 if resp.status_code == 200:
-                    data = resp.json()
+                    data = _loads_json(resp.content)
                     if "models" in data:
                         for m in data["models"]:
                             model_name = m.get("name", "")
@@ -379,128 +884,61 @@ class AIPlannerService:
                 self.logger.warning(f"Gemini ListModels {version} 异常: {e}")
         if not available_models:
             # 兜底
-            available_models = [("v1", "gemini-1.5-pro"), ("v1", "gemini-1.5-flash"), ("v1beta", "gemini-pro")]
+            return False, [("v1", "gemini-1.5-pro"), ("v1", "gemini-1.5-flash"), ("v1beta", "gemini-pro")]
         self.logger.info(f"自动探测到可用Gemini模型: {available_models}")
-        return available_models
+        return True, available_models
 
-    def _call_gemini_for_chat(self, messages: list, model_name: str) -> Optional[str]:
-        """调用Gemini模型进行问答，自动切换API版本和模型"""
-        available_models = self._detect_gemini_models()
-        for version, mname in available_models:
+    def _iter_gemini_texts(self, messages: list):
+        """依次尝试可用的Gemini API版本和模型，逐个产出成功返回的文本
+
+        Yields:
+            (version, model_name, text) 元组
+        """
+        headers = self._gemini_headers
+        body = _dumps_json_bytes({
+            "contents": _to_gemini_contents(messages),
+            "generationConfig": GEMINI_GENERATION_CONFIG
+        })
+        session = self._get_session_for_model("gemini")
+        for version, mname, url in self._gemini_model_endpoints():
             try:
-                session = self._get_session_for_model("gemini")
-                url = f"https://generativelanguage.googleapis.com/{version}/models/{mname}:generateContent"
-                headers = {
-                    "Content-Type": "application/json",
-                    "x-goog-api-key": self.api_keys['gemini']
-                }
-                # 转换消息格式
-                gemini_messages = []
-                for msg in messages:
-                    if msg["role"] == "system":
-                        gemini_messages.append({
-                            "role": "user",
-                            "parts": [{"text": msg["content"]}]
-                        })
-                    else:
-                        gemini_messages.append({
-                            "role": msg["role"],
-                            "parts": [{"text": msg["content"]}]
-                        })
-                data = {
-                    "contents": gemini_messages,
-                    "generationConfig": {
-                        "temperature": 0.7,
-                        "topK": 40,
-                        "topP": 0.95,
-                        "maxOutputTokens": 1024,
-                    }
-                }
                 self.logger.info(f"尝试Gemini {version}/{mname} ...")
-                response = session.post(url, headers=headers, json=data, timeout=30)
-                if response.status_code == 200:
-                    result = response.json()
-                    if "candidates" in result and result["candidates"]:
-                        candidate = result["candidates"][0]
-                        if "content" in candidate and "parts" in candidate["content"]:
-                            parts = candidate["content"]["parts"]
-                            if parts and "text" in parts[0]:
-                                return parts[0]["text"]
-                    else:
-                        self.logger.warning(f"Gemini {version}/{mname} 返回无candidates: {result}")
-                else:
+                response = session.post(url, headers=headers, data=body, timeout=30)
+                if response.status_code != 200:
                     self.logger.error(f"Gemini API调用失败，状态码: {response.status_code}，URL: {url}，返回: {response.text}")
-                    if response.status_code == 404:
-                        continue  # 尝试下一个模型
+                    continue
+                result = _loads_json(response.content)
             except Exception as e:
                 self.logger.error(f"Gemini API调用异常: {e}")
                 continue
+            if not result.get("candidates"):
+                self.logger.warning(f"Gemini {version}/{mname} 返回无candidates: {result}")
+                continue
+            text = _gemini_output_text(result)
+            if text:
+                yield version, mname, text
+
+    def _call_gemini_for_chat(self, messages: list, model_name: str) -> Optional[str]:
+        """调用Gemini模型进行问答，自动切换API版本和模型"""
+        for _, _, text in self._iter_gemini_texts(messages):
+            return text
         return None
 
     def _generate_plan_with_gemini_multi(self, messages: list) -> Optional[Dict[str, Any]]:
         """使用Gemini模型生成多轮对话的清理计划，自动切换API版本和模型"""
-        if not self.api_key:
+        if not self.api_keys.get("gemini"):
             self.logger.error("未初始化API密钥，无法生成计划")
             return None
-        available_models = self._detect_gemini_models()
-        for version, mname in available_models:
+        for version, mname, text in self._iter_gemini_texts(messages):
+            extracted_json_str = self._extract_json_from_text(text)
+            if not extracted_json_str:
+                return text
             try:
-                session = self._get_session_for_model("gemini")
-                url = f"https://generativelanguage.googleapis.com/{version}/models/{mname}:generateContent"
-                headers = {
-                    "Content-Type": "application/json",
-                    "x-goog-api-key": self.api_keys['gemini']
-                }
-                gemini_messages = []
-                for msg in messages:
-                    if msg["role"] == "system":
-                        gemini_messages.append({
-                            "role": "user",
-                            "parts": [{"text": msg["content"]}]
-                        })
-                    else:
-                        gemini_messages.append({
-                            "role": msg["role"],
-                            "parts": [{"text": msg["content"]}]
-                        })
-                data = {
-                    "contents": gemini_messages,
-                    "generationConfig": {
-                        "temperature": 0.7,
-                        "topK": 40,
-                        "topP": 0.95,
-                        "maxOutputTokens": 1024,
-                    }
-                }
-                self.logger.info(f"尝试Gemini {version}/{mname} ...")
-                response = session.post(url, headers=headers, json=data, timeout=30)
-                if response.status_code == 200:
-                    result = response.json()
-                    if "candidates" in result and result["candidates"]:
-                        candidate = result["candidates"][0]
-                        if "content" in candidate and "parts" in candidate["content"]:
-                            parts = candidate["content"]["parts"]
-                            if parts and "text" in parts[0]:
-                                text = parts[0]["text"]
-                                extracted_json_str = self._extract_json_from_text(text)
-                                if extracted_json_str:
-                                    try:
-                                        plan = json.loads(extracted_json_str)
-                                        self.logger.info(f"从Gemini({version}/{mname})成功接收并解析多轮计划")
-                                        return plan
-                                    except (json.JSONDecodeError, KeyError, ValueError) as e:
-                                        self.logger.debug(f"解析Gemini响应失败: {e}")
-                                else:
-                                    return text
-                    else:
-                        self.logger.warning(f"Gemini {version}/{mname} 返回无candidates: {result}")
-                else:
-                    self.logger.error(f"Gemini API调用失败，状态码: {response.status_code}，URL: {url}，返回: {response.text}")
-                    if response.status_code == 404:
-                        continue  # 尝试下一个模型
-            except Exception as e:
-                self.logger.error(f"Gemini API调用异常: {e}")
-                continue
+                plan = _loads_json(extracted_json_str)
+                self.logger.info(f"从Gemini({version}/{mname})成功接收并解析多轮计划")
+                return plan
+            except (json.JSONDecodeError, KeyError, ValueError) as e:
+                self.logger.debug(f"解析Gemini响应失败: {e}")
         return None
 
     def _call_ai_model(self, model_type: str, model_name: str, prompt: str = None, system_prompt: str = None, messages: list = None) -> Optional[str]:
@@ -540,14 +978,18 @@ class AIPlannerService:
                 last_error = e
                 self.logger.warning(f"模型 {model} 聊天失败，尝试下一个模型。错误: {e}")
         # 所有模型都失败，兜底自我介绍
-        return "我是你的磁盘清理智能助手，可以帮你生成和执行清理计划，也能和你闲聊。"
+        return _CHAT_FALLBACK_REPLY
+
+    async def acall_ai_model(self, model_type: str, model_name: str, prompt: str = None, system_prompt: str = None, messages: list = None) -> Optional[str]:
+        """_call_ai_model的异步版本，请求在线程中进行，调用方可与其他任务并行等待"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, functools.partial(self._call_ai_model, model_type, model_name, prompt, system_prompt, messages)
+        )
     
     def _call_qwen_for_chat(self, messages: list, model_name: str) -> Optional[str]:
         """调用Qwen模型进行问答"""
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_keys['qwen']}"
-        }
+        headers = self._qwen_headers
         payload = {
             "model": model_name,
             "input": {
@@ -563,19 +1005,10 @@ class AIPlannerService:
         
         try:
             session = self._get_session_for_model("qwen")
-            response = session.post(self.api_urls["qwen"], headers=headers, json=payload, timeout=(5, 30))
+            response = session.post(self.api_urls["qwen"], headers=headers, data=_dumps_json_bytes(payload), timeout=(5, 30))
             
             if response.status_code == 200:
-                result = response.json()
-                output = result.get("output", {})
-                
-                if "choices" in output:
-                    choices = output["choices"]
-                    if choices and len(choices) > 0:
-                        message = choices[0].get("message", {})
-                        return message.get("content", "")
-                elif "text" in output:
-                    return output["text"]
+                return _qwen_output_text(_loads_json(response.content))
             else:
                 self.logger.error(f"Qwen API调用失败，状态码: {response.status_code}")
                 
@@ -596,20 +1029,21 @@ class AIPlannerService:
         if not text or not isinstance(text, str):
             return None
         text = text.strip()
-        # 1. 直接尝试解析
-        try:
-            json.loads(text)
-            return text
-        except Exception:
-            pass
+        # 1. 快速路径：首尾即为JSON括号时直接尝试解析，否则跳过以免无谓的异常开销
+        if text and text[0] in "{[" and text[-1] in "}]":
+            try:
+                _loads_json(text)
+                return text
+            except Exception:
+                pass
         # 2. 去除 markdown 代码块
-        text = re.sub(r"^```json|^```|```$", "", text, flags=re.IGNORECASE).strip()
+        text = _CODE_FENCE_RE.sub("", text).strip()
         # 3. 提取所有 {...} 或 [...]，优先最长的
-        candidates = re.findall(r"(\{[\s\S]*\}|\[[\s\S]*\])", text)
+        candidates = _JSON_CANDIDATE_RE.findall(text)
         candidates = sorted(candidates, key=len, reverse=True)
         for candidate in candidates:
             try:
-                json.loads(candidate)
+                _loads_json(candidate)
                 return candidate
             except (json.JSONDecodeError, KeyError, ValueError):
                 continue
@@ -619,7 +1053,7 @@ class AIPlannerService:
             end = text.rfind('}') + 1
             json_candidate = text[start:end]
             try:
-                json.loads(json_candidate)
+                _loads_json(json_candidate)
                 return json_candidate
             except Exception:
                 pass
@@ -628,11 +1062,84 @@ class AIPlannerService:
             end = text.rfind(']') + 1
             json_candidate = text[start:end]
             try:
-                json.loads(json_candidate)
+                _loads_json(json_candidate)
                 return json_candidate
             except Exception:
                 pass
         return None
+
+    def _get_network_config(self, force: bool = False) -> Dict[str, Any]:
+        """获取网络环境配置，系统代理未变化时在有效期内复用检测结果
+
+        Args:
+            force: 是否忽略缓存强制重新检测
+        """
+        if force:
+            _cached_system_proxies.cache_clear()
+        proxies = _system_proxies()
+        key = tuple(sorted(proxies.items()))
+        cached = AIPlannerService._network_cache.get(key)
+        if not force and cached and time.monotonic() - cached[0] < NETWORK_CACHE_TTL:
+            return cached[1]
+        network_config = None if force else self._load_network_disk_cache(proxies)
+        if network_config is None:
+            network_config = self._detect_network_environment()
+            # 所有线路都不通时可能只是暂时断网，不落盘，避免在整个有效期内跨进程沿用失败结果
+            if network_config.get("qwen_route") or network_config.get("gemini_route"):
+                self._save_network_disk_cache(proxies, network_config)
+        else:
+            self.logger.info("使用缓存的网络环境检测结果，跳过连通性探测")
+        AIPlannerService._network_cache[key] = (time.monotonic(), network_config)
+        return network_config
+
+    def _network_cache_file(self) -> Path:
+        """网络环境检测结果的缓存文件路径"""
+        base_dir = getattr(self.config_manager, "user_config_dir", None) or Path.home() / ".c_disk_cleaner"
+        return Path(base_dir) / "network_cache.json"
+
+    def _load_network_disk_cache(self, proxies: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """读取未过期且代理设置一致的检测结果，并据此重建session
+
+        Args:
+            proxies: 当前系统代理配置
+
+        Returns:
+            网络环境配置；缓存不存在、过期或代理已变化时返回None
+        """
+        try:
+            data = _loads_json(self._network_cache_file().read_bytes())
+        except (OSError, ValueError):
+            return None
+        if (not isinstance(data, dict) or data.get("proxies") != proxies
+                or time.time() - data.get("timestamp", 0) >= NETWORK_DISK_CACHE_TTL):
+            return None
+        sessions = {"direct": _new_session(), "proxy": _new_session()}
+        sessions["proxy"].proxies.update(proxies)
+        network_config = {"has_vpn": bool(data.get("has_vpn"))}
+        for model in ("qwen", "gemini"):
+            route = data.get(f"{model}_route")
+            if route not in sessions:
+                route = None
+            network_config[f"can_access_{model}"] = route is not None
+            network_config[f"{model}_session"] = sessions.get(route)
+            network_config[f"{model}_route"] = route
+        return network_config
+
+    def _save_network_disk_cache(self, proxies: Dict[str, str], network_config: Dict[str, Any]):
+        """将检测结果（不含session对象）写入缓存文件"""
+        data = {
+            "timestamp": time.time(),
+            "proxies": proxies,
+            "has_vpn": network_config.get("has_vpn", False),
+            "qwen_route": network_config.get("qwen_route"),
+            "gemini_route": network_config.get("gemini_route"),
+        }
+        try:
+            cache_file = self._network_cache_file()
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            cache_file.write_bytes(_dumps_json_bytes(data))
+        except OSError as e:
+            self.logger.debug(f"写入网络检测缓存失败: {e}")
             
     def _detect_network_environment(self) -> Dict[str, Any]:
         """检测当前网络环境并配置相应的代理设置"""
@@ -641,74 +1148,60 @@ class AIPlannerService:
             "can_access_gemini": False,
             "can_access_qwen": False,
             "gemini_session": None,
-            "qwen_session": None
+            "qwen_session": None,
+            "gemini_route": None,
+            "qwen_route": None
         }
         
         self.logger.info("开始检测网络环境...")
         
         # 创建不同的session配置
         # 1. 直连session（用于qwen无VPN时）
-        direct_session = requests.Session()
-        direct_session.verify = False  # 允许不验证SSL证书
+        direct_session = _new_session()
         
         # 2. 代理session（用于gemini需要VPN时）
-        proxy_session = requests.Session()
-        proxy_session.verify = False
+        proxy_session = _new_session()
         
         # 检测是否有系统代理
-        system_proxies = requests.utils.get_environ_proxies("https://www.google.com")
+        system_proxies = _system_proxies()
         if system_proxies:
             self.logger.info(f"检测到系统代理配置: {system_proxies}")
             proxy_session.proxies.update(system_proxies)
             network_config["has_vpn"] = True
         
-        # 测试qwen API连接性
-        self.logger.info("测试qwen API连接性...")
-        qwen_accessible = self._test_api_connectivity("qwen", direct_session)
-        if qwen_accessible:
-            network_config["can_access_qwen"] = True
-            network_config["qwen_session"] = direct_session
-            self.logger.info("qwen API可通过直连访问")
-        else:
-            # 尝试通过代理访问qwen
-            qwen_accessible_proxy = self._test_api_connectivity("qwen", proxy_session)
-            if qwen_accessible_proxy:
-                network_config["can_access_qwen"] = True
-                network_config["qwen_session"] = proxy_session
-                self.logger.info("qwen API可通过代理访问")
-            else:
-                self.logger.warning("qwen API无法访问")
-        
-        # 测试gemini API连接性
-        self.logger.info("测试gemini API连接性...")
-        gemini_accessible = self._test_api_connectivity("gemini", proxy_session)
-        if gemini_accessible:
-            network_config["can_access_gemini"] = True
-            network_config["gemini_session"] = proxy_session
-            self.logger.info("gemini API可通过代理访问")
-        else:
-            # 尝试直连访问gemini
-            gemini_accessible_direct = self._test_api_connectivity("gemini", direct_session)
-            if gemini_accessible_direct:
-                network_config["can_access_gemini"] = True
-                network_config["gemini_session"] = direct_session
-                self.logger.info("gemini API可通过直连访问")
+        # 四个探测相互独立，并发执行，总耗时约等于单次超时
+        self.logger.info("并发测试qwen/gemini API连接性...")
+        probes = {
+            ("qwen", "direct"): direct_session,
+            ("qwen", "proxy"): proxy_session,
+            ("gemini", "proxy"): proxy_session,
+            ("gemini", "direct"): direct_session,
+        }
+        with ThreadPoolExecutor(max_workers=len(probes)) as executor:
+            futures = {key: executor.submit(self._test_api_connectivity, key[0], session) for key, session in probes.items()}
+            reachable = {key: future.result() for key, future in futures.items()}
+
+        # qwen 优先直连，gemini 优先代理（与原有顺序一致）
+        for model, routes in (("qwen", ("direct", "proxy")), ("gemini", ("proxy", "direct"))):
+            for route in routes:
+                if reachable[(model, route)]:
+                    network_config[f"can_access_{model}"] = True
+                    network_config[f"{model}_session"] = probes[(model, route)]
+                    network_config[f"{model}_route"] = route
+                    self.logger.info(f"{model} API可通过{'直连' if route == 'direct' else '代理'}访问")
+                    break
             else:
-                self.logger.warning("gemini API无法访问")
+                self.logger.warning(f"{model} API无法访问")
         
         self.logger.info(f"网络环境检测完成: VPN={network_config['has_vpn']}, Gemini可用={network_config['can_access_gemini']}, Qwen可用={network_config['can_access_qwen']}")
         return network_config
     
     def _test_api_connectivity(self, model: str, session: requests.Session, timeout: int = 5) -> bool:
-        """测试指定模型的API连接性"""
+        """测试指定模型的API连接性（HEAD请求，不下载页面内容）"""
         try:
             if model == "qwen":
                 # 测试qwen API
-                url = "https://dashscope.aliyuncs.com"
-                headers = {}
-                if self.api_keys.get("qwen"):
-                    headers["Authorization"] = f"Bearer {self.api_keys['qwen']}"
-                response = session.get(url, headers=headers, timeout=timeout)
+                response = session.head(QWEN_HOST, headers=self._qwen_headers, allow_redirects=False, timeout=timeout)
                 # 增加状态码检查
                 if response.status_code >= 500:
                     self.logger.warning(f"Qwen API服务器返回错误状态码: {response.status_code}")
@@ -716,8 +1209,7 @@ class AIPlannerService:
                 return response.status_code < 500
             elif model == "gemini":
                 # 测试gemini API
-                url = "https://generativelanguage.googleapis.com"
-                response = session.get(url, timeout=timeout)
+                response = session.head(GEMINI_HOST, allow_redirects=False, timeout=timeout)
                 # 增加状态码检查
                 if response.status_code >= 500:
                     self.logger.warning(f"Gemini API服务器返回错误状态码: {response.status_code}")
@@ -726,11 +1218,14 @@ class AIPlannerService:
         except requests.exceptions.Timeout:
             self.logger.warning(f"测试{model} API连接超时")
             return False
+        except (requests.exceptions.SSLError, requests.exceptions.ChunkedEncodingError):
+            # 网络不稳定时的常见瞬时错误，直接判定不可达
+            return False
         except requests.exceptions.ConnectionError as e:
             self.logger.warning(f"测试{model} API连接失败: {e}")
             return False
         except Exception as e:
-            self.logger.error(f"测试{model} API时发生未知错误: {e}")
+            self.logger.debug(f"测试{model} API时发生未知错误: {e}")
             return False
         return False
     
@@ -742,9 +1237,9 @@ class AIPlannerService:
             return self.network_config["gemini_session"]
         else:
             # 网络检测不可用时，返回默认session，始终允许尝试请求
-            session = requests.Session()
-            session.verify = False
-            return session
+            if model not in self._sessions:
+                self._sessions[model] = _new_session()
+            return self._sessions[model]
 
     def _auto_select_model_name(self, main_model: str) -> str:
         """根据优先级自动选择可用的具体大模型"""
@@ -758,6 +1253,7 @@ class AIPlannerService:
 if __name__ == '__main__':
     # 示例用法（需要设置API密钥或在配置文件中配置）
     import argparse
+    import sys
     
     # 创建命令行参数解析器
     parser = argparse.ArgumentParser(description="测试AI规划服务")
@@ -794,14 +1290,12 @@ if __name__ == '__main__':
 
         if generated_plan:
             print("\n生成的清理计划:")
-            print(json.dumps(generated_plan, indent=2, ensure_ascii=False))
-            # 在清理计划输出时，自动遍历并列举所有可删除的路径（伪代码，实际应在UI/CLI展示层实现）
-            # def print_deletable_paths(plan):
-            #     if plan and 'steps' in plan:
-            #         print('可删除的路径列表:')
-            #         for idx, step in enumerate(plan['steps'], 1):
-            #             if 'path' in step:
-            #                 print(f"{idx}. {step['path']}")
+            print(_dumps_plan(generated_plan))
+            # 列举所有可删除的路径，一次性写出，避免逐行print
+            if 'steps' in generated_plan:
+                lines = [f"{i}. {s['path']}" for i, s in enumerate(generated_plan['steps'], 1) if isinstance(s, dict) and 'path' in s]
+                if lines:
+                    sys.stdout.write("可删除的路径列表:\n" + "\n".join(lines) + "\n")
         else:
             print("\n生成计划失败。")
             
@@ -817,7 +1311,7 @@ if __name__ == '__main__':
                 
                 if generated_plan:
                     print("\n生成的清理计划:")
-                    print(json.dumps(generated_plan, indent=2, ensure_ascii=False))
+                    print(_dumps_plan(generated_plan))
                 else:
                     print("\n使用备选模型生成计划也失败了。")
     else:
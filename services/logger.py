@@ -9,6 +9,7 @@ import os
 import sys
 import time
 import json
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Union
@@ -19,9 +20,17 @@ import logging
 from data.database import Database
 from config.manager import ConfigManager
 
+# 进程内共享的日志服务实例，见 get_logger_service
+_LOGGER_SINGLETON: Optional["LoggerService"] = None
+_LOGGER_SINGLETON_LOCK = threading.Lock()
+
 
 class DatabaseHandler:
-    """数据库日志处理器，将日志存储到数据库"""
+    """数据库日志处理器，将日志批量存储到数据库"""
+
+    # 缓冲达到该条数或距上次写入超过该秒数时批量写入
+    FLUSH_SIZE = 100
+    FLUSH_INTERVAL = 0.5
     
     def __init__(self, database=None):
         """初始化数据库日志处理器
@@ -29,66 +38,102 @@ class DatabaseHandler:
         Args:
             database: 数据库实例，如果为None则创建新实例
         """
+        # 只关闭自己创建的数据库连接，调用方传入的连接由调用方负责关闭
+        self._owns_db = database is None
         self.db = database or Database()
+        self._buf = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
     
     def write(self, message):
-        """写入日志到数据库
+        """缓冲日志，满足条件时批量写入数据库
         
         Args:
             message: 日志消息字典
         """
         try:
-            # 构造日志条目
             record = message.record
-            
-            # --- 由于 LogEntry 被注释，这里暂时无法创建对象 --- #
-            # log_entry = LogEntry(
-            #     id=0,  # 数据库会自动分配ID
-            #     timestamp=record["time"].datetime,
-            #     level=record["level"].name,
-            #     message=record["message"],
-            #     module=record["name"],
-            #     function=record["function"],
-            #     task_id=record.get("extra", {}).get("task_id"),
-            #     details={
-            #         "line": record["line"],
-            #         "file": record["file"].path,
-            #         "process": record["process"].id,
-            #         "thread": record["thread"].id,
-            #         "exception": str(record["exception"]) if record["exception"] else None,
-            #         "elapsed": record["elapsed"].total_seconds()
-            #     }
-            # )
-            # --- ----------------------------------------- --- #
-            
-            # 保存到数据库 (需要调整，因为 LogEntry 不可用)
-            # 暂时直接传递 record 字典的关键信息，或者跳过保存
-            # self.db.save_log(log_entry) # 必须注释掉或修改
-            print(f"[DB Handler - LogEntry commented out]: {record['message']}", file=sys.stderr)
-            
+            with self._lock:
+                self._buf.append((
+                    record["time"].isoformat(),
+                    record["level"].name,
+                    record["message"],
+                    record["name"],
+                    record["function"],
+                    record["extra"].get("task_id"),
+                ))
+                if len(self._buf) >= self.FLUSH_SIZE or time.monotonic() - self._last_flush > self.FLUSH_INTERVAL:
+                    self._flush_locked()
         except Exception as e:
             # 这里不能用logger记录，否则可能导致递归调用
-            print(f"Failed to save log to database: {e}", file=sys.stderr)
+            sys.stderr.write(f"Failed to save log to database: {e}\n")
+
+    def flush(self):
+        """立即写入缓冲中的日志"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        """批量写入缓冲中的日志（调用方需持有锁）"""
+        buf, self._buf = self._buf, []
+        self._last_flush = time.monotonic()
+        self.db.save_logs(buf)
     
     def close(self):
-        """关闭处理器，释放资源"""
-        self.db.close()
+        """写入剩余日志并关闭处理器，释放资源"""
+        try:
+            self.flush()
+        except Exception as e:
+            sys.stderr.write(f"Failed to save log to database: {e}\n")
+        if self._owns_db:
+            self.db.close()
 
 
 class LoggerService:
     """日志服务类，处理日志的收集、记录和查询"""
     
-    def __init__(self, log_file: str = "logs/app.log"):
+    def __init__(self, log_file: str = "logs/app.log", database=None):
         """初始化日志服务
         
         Args:
             log_file: 日志文件路径
+            database: 数据库实例，提供时日志同时写入数据库
         """
         os.makedirs(os.path.dirname(log_file), exist_ok=True)
         logger.remove()
         logger.add(sys.stdout, level="INFO", colorize=True, enqueue=True)
         logger.add(log_file, rotation="10 MB", retention="10 days", encoding="utf-8", enqueue=True)
+        self.db_handler = None
+        if database is not None:
+            self.attach_database(database)
         self.logger = logger
+
+    def attach_database(self, database) -> bool:
+        """添加数据库日志sink，已有数据库sink时不重复添加
+
+        Args:
+            database: 数据库实例
+
+        Returns:
+            是否新添加了sink
+        """
+        if self.db_handler is not None:
+            return False
+        # 数据库写入在loguru的后台线程中进行，不阻塞记录日志的调用方
+        self.db_handler = DatabaseHandler(database)
+        self.db_handler_id = logger.add(self.db_handler.write, level="INFO", enqueue=True)
+        return True
+
+    def get_logger(self, name: Optional[str] = None):
+        """获取日志记录器
+
+        Args:
+            name: 模块名称（可选），会绑定到日志的extra字段
+
+        Returns:
+            loguru日志记录器
+        """
+        return self.logger.bind(module=name) if name else self.logger
     
     def info(self, msg: str):
         """记录信息日志
@@ -122,6 +167,44 @@ class LoggerService:
         """
         self.logger.debug(msg)
 
+    def close(self):
+        """等待队列中的日志写完并关闭数据库日志处理器"""
+        logger.complete()
+        if self.db_handler is not None:
+            logger.remove(self.db_handler_id)
+            self.db_handler.close()
+            self.db_handler = None
+
+    def exception(self, msg: str):
+        """记录错误日志并附带当前异常堆栈（仅在输出时才格式化堆栈）
+
+        Args:
+            msg: 日志消息
+        """
+        self.logger.opt(exception=True).error(msg)
+
+
+def get_logger_service(log_file: str = "logs/app.log", database=None) -> LoggerService:
+    """获取进程内共享的日志服务，首次调用时创建
+
+    loguru的logger是全局单例，重复创建LoggerService会重复添加sink，导致每条日志被写入多次，
+    且创建时会移除已有的全局sink（如调度器日志文件）。
+
+    Args:
+        log_file: 日志文件路径，仅首次创建时生效
+        database: 数据库实例，共享实例还没有数据库sink时为其添加
+
+    Returns:
+        日志服务实例
+    """
+    global _LOGGER_SINGLETON
+    with _LOGGER_SINGLETON_LOCK:
+        if _LOGGER_SINGLETON is None:
+            _LOGGER_SINGLETON = LoggerService(log_file, database)
+        elif database is not None:
+            _LOGGER_SINGLETON.attach_database(database)
+    return _LOGGER_SINGLETON
+
 
 # 简单测试
 if __name__ == "__main__":
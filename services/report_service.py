@@ -6,19 +6,64 @@
 """
 
 import os
+import copy
 import json
+import heapq
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Union
 from pathlib import Path
-import pandas as pd
-import matplotlib.pyplot as plt
+from concurrent.futures import ThreadPoolExecutor
 from loguru import logger
 
-from services.logger import LoggerService
+try:
+    import orjson
+except ImportError:  # orjson为可选加速依赖
+    orjson = None
+
+from services.logger import get_logger_service
 from data.models import ScanResult, CleanTask
 from data.database import Database
 from config.manager import ConfigManager
 
+# matplotlib.pyplot 延迟导入后的缓存，只在首次生成图表时加载
+_plt = None
+
+
+def _get_pyplot():
+    """延迟导入matplotlib并使用无界面的Agg后端，避免启动时的导入和GUI后端探测开销"""
+    global _plt
+    if _plt is None:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        _plt = plt
+    return _plt
+
+
+def _file_ext(path: str) -> str:
+    """获取小写扩展名，语义同 os.path.splitext，但同时识别 / 和 \\ 分隔符且开销更低"""
+    name = path[max(path.rfind('/'), path.rfind('\\')) + 1:].lstrip('.')
+    _, dot, ext = name.rpartition('.')
+    return f".{ext.lower()}" if dot else ""
+
+
+def _write_report_json(report_file: Path, data: Dict[str, Any]):
+    """将报告数据写入缩进JSON文件，优先使用orjson"""
+    if orjson is not None:
+        report_file.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
+    report_file.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
+
+
+def _read_report_json(report_file: Union[str, Path]) -> Any:
+    """读取报告JSON文件，优先使用orjson"""
+    if orjson is not None:
+        with open(report_file, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(report_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
 class ReportService:
     """报告服务类，用于生成各种清理和分析报告"""
 
@@ -34,7 +79,7 @@ class ReportService:
         
         # 初始化日志服务
         try:
-            self.logger_service = LoggerService(config_manager=self.config, database=self.db)
+            self.logger_service = get_logger_service(database=self.db)
             self.logger = self.logger_service.get_logger(__name__)
         except Exception as e:
             self.logger = logger
@@ -44,6 +89,10 @@ class ReportService:
         self.report_dir = Path(self.config.get("reports.output_dir", "reports"))
         self.report_dir.mkdir(parents=True, exist_ok=True)
 
+        # 报告列表缓存: {(报告类型, 是否含内容): ((最新修改时间, 文件数), 报告列表)}，
+        # 每种查询只保留目录最新状态对应的一份结果
+        self._reports_cache: Dict[tuple, tuple] = {}
+
     def generate_cleanup_report(self, clean_task_id: str) -> Optional[Dict[str, Any]]:
         """生成清理任务报告
         
@@ -88,8 +137,7 @@ class ReportService:
 
             # 生成报告文件
             report_file = self.report_dir / f"cleanup_report_{clean_task_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            with open(report_file, 'w', encoding='utf-8') as f:
-                json.dump(report_data, f, ensure_ascii=False, indent=2)
+            self._save_report(report_file, report_data)
 
             self.logger.info(f"清理报告已生成: {report_file}")
             return report_data
@@ -114,14 +162,19 @@ class ReportService:
                 self.logger.error(f"扫描结果 {scan_id} 不存在")
                 return None
 
-            # 分析文件类型分布
-            file_types = {}
-            for item in scan_result.items:
-                ext = os.path.splitext(item.path)[1].lower() or "无扩展名"
-                if ext not in file_types:
-                    file_types[ext] = {"count": 0, "size": 0}
-                file_types[ext]["count"] += 1
-                file_types[ext]["size"] += item.size
+            import pandas as pd  # 延迟导入，仅空间分析报告需要
+
+            # 分析文件类型分布（按扩展名分组聚合）
+            items = scan_result.items
+            df = pd.DataFrame({
+                "size": [item.size for item in items],
+                "ext": [_file_ext(item.path) or "无扩展名" for item in items],
+            })
+            grouped = df.groupby("ext", sort=False)["size"].agg(["count", "sum"])
+            file_types = {
+                ext: {"count": int(count), "size": int(size)}
+                for ext, count, size in grouped.itertuples()
+            }
 
             # 生成分析数据
             analysis_data = {
@@ -130,17 +183,15 @@ class ReportService:
                 "total_items": scan_result.total_items,
                 "total_size": scan_result.total_size,
                 "file_type_distribution": file_types,
-                "largest_files": sorted(
-                    [{"path": item.path, "size": item.size} for item in scan_result.items],
-                    key=lambda x: x["size"],
-                    reverse=True
-                )[:10]  # 前10个最大文件
+                "largest_files": [
+                    {"path": item.path, "size": item.size}
+                    for item in heapq.nlargest(10, items, key=lambda i: i.size)
+                ]  # 前10个最大文件
             }
 
             # 生成报告文件
             report_file = self.report_dir / f"space_analysis_{scan_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            with open(report_file, 'w', encoding='utf-8') as f:
-                json.dump(analysis_data, f, ensure_ascii=False, indent=2)
+            self._save_report(report_file, analysis_data)
 
             # 生成可视化图表
             self._generate_space_visualization(analysis_data, scan_id)
@@ -160,6 +211,8 @@ class ReportService:
             scan_id: 扫描ID
         """
         try:
+            plt = _get_pyplot()
+
             # 创建图表目录
             charts_dir = self.report_dir / "charts"
             charts_dir.mkdir(parents=True, exist_ok=True)
@@ -177,8 +230,11 @@ class ReportService:
             # 最大文件条形图
             plt.figure(figsize=(12, 6))
             largest_files = analysis_data["largest_files"]
-            file_names = [os.path.basename(f["path"]) for f in largest_files]
-            file_sizes = [f["size"] / (1024 * 1024) for f in largest_files]  # 转换为MB
+            file_names = []
+            file_sizes = []
+            for f in largest_files:
+                file_names.append(os.path.basename(f["path"]))
+                file_sizes.append(f["size"] / (1024 * 1024))  # 转换为MB
             plt.barh(file_names, file_sizes)
             plt.title("最大文件TOP10")
             plt.xlabel("大小 (MB)")
@@ -189,32 +245,65 @@ class ReportService:
         except Exception as e:
             self.logger.error(f"生成可视化图表时发生错误: {e}")
 
-    def list_reports(self, report_type: Optional[str] = None) -> List[Dict[str, Any]]:
+    def _save_report(self, report_file: Path, data: Dict[str, Any]):
+        """写入报告文件并使报告列表缓存失效
+
+        Args:
+            report_file: 报告文件路径
+            data: 报告数据
+        """
+        _write_report_json(report_file, data)
+        self._reports_cache.clear()
+
+    def list_reports(self, report_type: Optional[str] = None, include_data: bool = False) -> List[Dict[str, Any]]:
         """列出所有报告
         
         Args:
             report_type: 报告类型（可选），如 'cleanup' 或 'space_analysis'
+            include_data: 是否读取并返回报告内容，默认只返回文件信息
             
         Returns:
             报告列表
         """
         try:
+            # DirEntry.stat() 可复用目录读取时得到的信息，减少系统调用
+            entries = []
+            with os.scandir(self.report_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(".json") or not entry.is_file():
+                        continue
+                    if report_type and not entry.name.startswith(report_type):
+                        continue
+                    entries.append((entry, entry.stat()))
+
+            # 目录未变化时直接返回缓存结果的副本，调用方修改返回值不会影响缓存
+            cache_key = (report_type, include_data)
+            sig = (max((stat.st_mtime for _, stat in entries), default=0.0), len(entries))
+            cached = self._reports_cache.get(cache_key)
+            if cached is not None and cached[0] == sig:
+                return copy.deepcopy(cached[1])
+
             reports = []
-            for file in self.report_dir.glob("*.json"):
-                if report_type and not file.name.startswith(report_type):
-                    continue
+            files = []
+            for entry, stat in entries:
+                files.append(entry.path)
+                reports.append({
+                    "file_name": entry.name,
+                    "file_path": entry.path,
+                    "created_time": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                    "report_type": "cleanup" if "cleanup_report" in entry.name else "space_analysis",
+                    "size": stat.st_size
+                })
                 
-                with open(file, 'r', encoding='utf-8') as f:
-                    report_data = json.load(f)
-                    reports.append({
-                        "file_name": file.name,
-                        "file_path": str(file),
-                        "created_time": datetime.fromtimestamp(file.stat().st_mtime).isoformat(),
-                        "report_type": "cleanup" if "cleanup_report" in file.name else "space_analysis",
-                        "data": report_data
-                    })
+            if include_data and files:
+                # 各报告文件相互独立，并行读取
+                with ThreadPoolExecutor(max_workers=min(8, len(files))) as executor:
+                    for report, report_data in zip(reports, executor.map(_read_report_json, files)):
+                        report["data"] = report_data
             
-            return sorted(reports, key=lambda x: x["created_time"], reverse=True)
+            reports.sort(key=lambda x: x["created_time"], reverse=True)
+            self._reports_cache[cache_key] = (sig, reports)
+            return copy.deepcopy(reports)
         except Exception as e:
             self.logger.error(f"列出报告时发生错误: {e}")
             return []
@@ -232,6 +321,7 @@ class ReportService:
             file_path = self.report_dir / report_file
             if file_path.exists():
                 file_path.unlink()
+                self._reports_cache.clear()
                 self.logger.info(f"报告文件已删除: {file_path}")
                 return True
             return False
@@ -273,10 +363,11 @@ class ReportService:
                     "cleaned": cleaned
                 }
             # 释放空间TOP5
-            top_cleaned = sorted(
-                [(cat, v["cleaned"]) for cat, v in category_changes.items()],
-                key=lambda x: x[1], reverse=True
-            )[:5]
+            top_cleaned = heapq.nlargest(
+                5,
+                ((cat, v["cleaned"]) for cat, v in category_changes.items()),
+                key=lambda x: x[1]
+            )
             # 详细变化
             detail = {
                 "files_cleaned": clean_task.files_to_clean,
@@ -298,8 +389,7 @@ class ReportService:
             }
             # 保存报告
             report_file = self.report_dir / f"comparison_report_{scan_id}_{clean_task_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            with open(report_file, 'w', encoding='utf-8') as f:
-                json.dump(report, f, ensure_ascii=False, indent=2)
+            self._save_report(report_file, report)
             self.logger.info(f"清理前后对比报告已生成: {report_file}")
             return report
         except Exception as e:
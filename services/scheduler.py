@@ -7,23 +7,84 @@
 
 import os
 import time
+import asyncio
+import ctypes
+from array import array
 import threading
-import psutil
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Callable, Any
+from typing import Dict, List, Optional, Set, Tuple, Callable, Any
 from pathlib import Path
 from loguru import logger
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
-from apscheduler.triggers.interval import IntervalTrigger
 
 from data.models import SystemInfo
+from data.database import Database
 from config.manager import ConfigManager
 from services.task_manager import TaskManager
 
+# 一天的秒数
+SECONDS_PER_DAY = 86400
+
+# 任务默认参数：错过的多次触发合并为一次执行（如休眠唤醒后），同一任务不重叠运行，
+# 错过触发时间一小时内仍补执行
+SCHEDULER_JOB_DEFAULTS = {
+    "coalesce": True,
+    "max_instances": 1,
+    "misfire_grace_time": 3600,
+}
+# 执行任务的线程数
+SCHEDULER_MAX_WORKERS = 4
+
+# _sysinfo_raw 中各项的下标：C盘总容量、可用、已用，总内存、可用内存（字节）
+_C_TOTAL, _C_FREE, _C_USED, _RAM_TOTAL, _RAM_AVAILABLE = range(5)
+
+# 初始化时预热CPU使用率计数器的等待时间（秒）
+CPU_PRIME_SECONDS = 0.05
+
+# 默认的调度器日志文件（配置项 logging.scheduler_file），经loguru后台队列带缓冲写入，
+# 任务回调不等待磁盘I/O
+SCHEDULER_LOG_FILE = "logs/scheduler.log"
+
+# Windows下直接调用GetDiskFreeSpaceExW获取磁盘容量，跳过psutil的跨平台封装
+if os.name == "nt":
+    _kernel32 = ctypes.windll.kernel32
+    _kernel32.GetDiskFreeSpaceExW.argtypes = [
+        ctypes.c_wchar_p,
+        ctypes.POINTER(ctypes.c_ulonglong),
+        ctypes.POINTER(ctypes.c_ulonglong),
+        ctypes.POINTER(ctypes.c_ulonglong),
+    ]
+else:
+    _kernel32 = None
+
+
+def _fast_disk_usage(path: str) -> Tuple[int, int, int]:
+    """获取磁盘容量信息
+
+    Args:
+        path: 磁盘路径
+
+    Returns:
+        (总容量, 已用, 剩余) 字节数
+    """
+    if _kernel32 is not None:
+        # 缓冲区每次调用单独分配，避免多线程同时刷新系统信息时互相覆盖
+        total = ctypes.c_ulonglong()
+        free = ctypes.c_ulonglong()
+        if _kernel32.GetDiskFreeSpaceExW(path, None, ctypes.byref(total), ctypes.byref(free)):
+            return total.value, total.value - free.value, free.value
+    import psutil
+    usage = psutil.disk_usage(path)
+    return usage.total, usage.used, usage.free
+
 
 class SchedulerService:
     """调度器服务类，负责定时任务和系统监控"""
+
+    # 调度器日志sink的ID，进程内只添加一次
+    _log_sink_id: Optional[int] = None
+
+    # 固定的cron触发器，首次使用时构建一次，所有实例共享（构建后不再变化）
+    _cron_triggers: Optional[Dict[str, Any]] = None
     
     def __init__(self, config_manager=None, task_manager=None):
         """初始化调度器服务
@@ -35,38 +96,56 @@ class SchedulerService:
         self.config = config_manager or ConfigManager()
         self.task_manager = task_manager or TaskManager()
         
+        # 延迟导入，仅在真正使用调度器时加载psutil
+        import psutil
+
         # 初始化调度器
-        self.scheduler = BackgroundScheduler()
+        self.scheduler = self._create_scheduler()
         
-        # 系统信息
-        self.system_info = self._get_system_info()
+        # 系统盘路径只需解析一次
+        self._system_drive = os.environ.get('SystemDrive', 'C:') + os.sep
+        self._has_system_drive = os.path.isdir(self._system_drive)
+        if not self._has_system_drive:
+            logger.warning(f"系统盘 {self._system_drive} 不存在，将不采集磁盘信息")
+        # 预热CPU使用率计数器，之后以非阻塞方式获取两次调用之间的使用率；
+        # 仅在初始化时短暂等待一次，使首次采集的CPU使用率有意义，监控任务中从不阻塞
+        psutil.cpu_percent(interval=None)
+        time.sleep(CPU_PRIME_SECONDS)
+
+        # 调度相关配置快照，start() 时重新读取
+        self._schedule_cfg = self._load_schedule_config()
+
+        # 系统信息，刷新间隔不短于 _min_sysinfo_interval 秒
+        self._min_sysinfo_interval = self._schedule_cfg["sysinfo_min_interval"]
+        self._sysinfo_raw = array('Q', [0] * 5)
+        self._cpu_usage = 0.0
+        self._sysinfo_time = datetime.now()
+        self._system_info: Optional[SystemInfo] = None
+        self._collect_system_info()
+        self._last_sysinfo_ts = time.monotonic()
         
         # 已注册的任务ID
-        self.job_ids = []
+        self.job_ids: Set[str] = set()
+
+        # 上次因磁盘空间不足自动启动扫描的时间（monotonic），用于冷却
+        self._last_lowdisk_scan: Optional[float] = None
+
+        # 任务管理器没有数据库连接时自建的连接，首次使用时创建，close() 时关闭
+        self._db: Optional[Database] = None
     
     def start(self):
         """启动调度器"""
+        # 重新读取调度配置，修改配置后重新调用start即可生效
+        self._schedule_cfg = self._load_schedule_config()
+        self._min_sysinfo_interval = self._schedule_cfg["sysinfo_min_interval"]
+
         # 先清理已有任务
-        for job_id in self.job_ids:
-            if self.scheduler.get_job(job_id):
-                self.scheduler.remove_job(job_id)
-        
-        self.job_ids = []
-        
-        # 注册系统监控任务
-        self._register_system_monitor()
-        
-        # 注册自动扫描任务
-        self._register_auto_scan()
-        
-        # 注册自动清理任务
-        self._register_auto_clean()
+        self.scheduler.remove_all_jobs()
+        self.job_ids.clear()
         
-        # 注册自动清理旧备份任务
-        self._register_cleanup_old_backups()
-        
-        # 注册自动清理日志任务
-        self._register_cleanup_logs()
+        # 注册系统监控、自动扫描、自动清理、清理旧备份和清理日志任务
+        for job_id, func, trigger, kwargs in self._build_registrations():
+            self.add_task(job_id=job_id, func=func, trigger=trigger, **kwargs)
         
         # 启动调度器
         self.scheduler.start()
@@ -78,6 +157,78 @@ class SchedulerService:
             self.scheduler.shutdown()
         logger.info("调度器服务已停止")
     
+    @staticmethod
+    def _create_scheduler():
+        """创建调度器：在事件循环中创建时复用该循环，否则使用独立的后台线程
+
+        Returns:
+            APScheduler调度器实例
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if loop is not None:
+            # AsyncIOScheduler 无需额外的调度线程，同步任务函数由其执行器放入线程池运行
+            from apscheduler.schedulers.asyncio import AsyncIOScheduler
+            return AsyncIOScheduler(event_loop=loop, job_defaults=SCHEDULER_JOB_DEFAULTS)
+
+        from apscheduler.schedulers.background import BackgroundScheduler
+        from apscheduler.executors.pool import ThreadPoolExecutor
+        return BackgroundScheduler(
+            job_defaults=SCHEDULER_JOB_DEFAULTS,
+            executors={"default": ThreadPoolExecutor(SCHEDULER_MAX_WORKERS)}
+        )
+
+    @classmethod
+    def add_log_sink(cls, log_file: Optional[str] = None):
+        """添加调度器专用的异步缓冲日志sink（仅记录本模块日志）
+
+        创建调度器服务不会写日志文件，由应用入口调用本方法；进程内只添加一次。
+
+        Args:
+            log_file: 日志文件路径，为None时使用配置项 logging.scheduler_file
+        """
+        if cls._log_sink_id is not None:
+            return
+        if log_file is None:
+            log_file = ConfigManager.shared().get('logging.scheduler_file', SCHEDULER_LOG_FILE)
+        try:
+            log_dir = os.path.dirname(log_file)
+            if log_dir:
+                os.makedirs(log_dir, exist_ok=True)
+            cls._log_sink_id = logger.add(
+                log_file,
+                filter=__name__,
+                level="INFO",
+                enqueue=True,
+                rotation="10 MB",
+                compression="zip",
+                encoding="utf-8",
+                buffering=8192
+            )
+        except Exception as e:
+            logger.warning(f"添加调度器日志文件失败: {e}")
+
+    def _load_schedule_config(self) -> Dict[str, Any]:
+        """一次性读取调度相关配置并填充默认值
+
+        Returns:
+            调度配置字典
+        """
+        get = self.config.get
+        return {
+            "auto_scan_enabled": get("schedule.auto_scan.enabled", False),
+            "auto_scan_interval_days": get("schedule.auto_scan.interval_days", 7),
+            "auto_clean_enabled": get("schedule.auto_clean.enabled", False),
+            "auto_clean_interval_days": get("schedule.auto_clean.interval_days", 14),
+            "low_disk_enabled": get("schedule.scan_on_low_disk.enabled", True),
+            "low_disk_threshold_percent": get("schedule.scan_on_low_disk.threshold_percent", 10),
+            "low_disk_cooldown_sec": get("schedule.scan_on_low_disk.cooldown_sec", 21600),
+            "sysinfo_min_interval": get("schedule.sysinfo_min_interval", 2.0),
+        }
+
     def add_task(self, job_id: str, func: Callable, trigger: Any, **kwargs):
         """添加任务
         
@@ -87,10 +238,11 @@ class SchedulerService:
             trigger: 触发器
             **kwargs: 其他参数
         """
-        if job_id in self.job_ids:
-            # 如果任务已存在，先移除
-            self.scheduler.remove_job(job_id)
+        # 显式指定，避免调用方覆盖调度器默认值时出现重叠执行
+        kwargs.setdefault("coalesce", True)
+        kwargs.setdefault("max_instances", 1)
         
+        # replace_existing=True 时同ID的已有任务会被直接替换
         self.scheduler.add_job(
             func=func,
             trigger=trigger,
@@ -99,7 +251,7 @@ class SchedulerService:
             **kwargs
         )
         
-        self.job_ids.append(job_id)
+        self.job_ids.add(job_id)
         logger.info(f"已添加任务: {job_id}")
     
     def remove_task(self, job_id: str):
@@ -114,62 +266,70 @@ class SchedulerService:
             logger.info(f"已移除任务: {job_id}")
     
     def get_system_info(self) -> SystemInfo:
-        """获取系统信息
+        """获取系统信息，距上次刷新不足最短间隔时直接返回缓存
         
         Returns:
             系统信息对象
         """
+        self._refresh_system_info()
         return self.system_info
+
+    @property
+    def system_info(self) -> SystemInfo:
+        """最近一次采集的系统信息，仅在被访问时才构建模型对象"""
+        if self._system_info is None:
+            raw = self._sysinfo_raw
+            self._system_info = SystemInfo(
+                c_drive_total=raw[_C_TOTAL],
+                c_drive_free=raw[_C_FREE],
+                c_drive_used=raw[_C_USED],
+                ram_total=raw[_RAM_TOTAL],
+                ram_available=raw[_RAM_AVAILABLE],
+                cpu_usage=self._cpu_usage,
+                updated_time=self._sysinfo_time
+            )
+        return self._system_info
     
     def update_system_info(self):
         """更新系统信息"""
-        self.system_info = self._get_system_info()
+        self._refresh_system_info()
         
         # 检查磁盘空间是否不足
         if self._check_low_disk_space():
             # 如果不足，启动扫描
             self._handle_low_disk_space()
     
-    def _get_system_info(self) -> SystemInfo:
-        """获取系统信息
+    def _refresh_system_info(self):
+        """在超过最短刷新间隔时重新采集系统信息"""
+        now = time.monotonic()
+        if now - self._last_sysinfo_ts >= self._min_sysinfo_interval:
+            self._collect_system_info()
+            self._last_sysinfo_ts = now
         
-        Returns:
-            系统信息对象
-        """
-        try:
-            # 获取C盘信息
-            # 动态获取系统盘符
-            import os
-            system_drive = os.environ.get('SystemDrive', 'C:') + os.sep
-            c_disk = psutil.disk_usage(system_drive)
+    def _collect_system_info(self):
+        """采集系统信息，原始数值写入 _sysinfo_raw，不构建模型对象"""
+        import psutil
             
-            # 获取内存信息
-            memory = psutil.virtual_memory()
+        raw = self._sysinfo_raw
+        self._sysinfo_time = datetime.now()
             
-            # 获取CPU使用率
-            cpu_usage = psutil.cpu_percent(interval=0.1)
+        # 内存信息和CPU使用率（CPU使用率为距上次调用的平均值，不阻塞）
+        memory = psutil.virtual_memory()
+        raw[_RAM_TOTAL] = memory.total
+        raw[_RAM_AVAILABLE] = memory.available
+        self._cpu_usage = psutil.cpu_percent(interval=None)
             
-            return SystemInfo(
-                c_drive_total=c_disk.total,
-                c_drive_free=c_disk.free,
-                c_drive_used=c_disk.used,
-                ram_total=memory.total,
-                ram_available=memory.available,
-                cpu_usage=cpu_usage,
-                updated_time=datetime.now()
-            )
-        except Exception as e:
-            logger.error(f"获取系统信息失败: {e}")
-            # 返回一个空对象
-            return SystemInfo(
-                c_drive_total=0,
-                c_drive_free=0,
-                c_drive_used=0,
-                ram_total=0,
-                ram_available=0,
-                cpu_usage=0.0,
-                updated_time=datetime.now()
-            )
+        # 系统盘信息，磁盘不存在时直接置零；只有这一步可能因磁盘被锁定等原因失败
+        if self._has_system_drive:
+            try:
+                raw[_C_TOTAL], raw[_C_USED], raw[_C_FREE] = _fast_disk_usage(self._system_drive)
+            except Exception as e:
+                logger.error(f"获取系统盘信息失败: {e}")
+                raw[_C_TOTAL] = raw[_C_USED] = raw[_C_FREE] = 0
+        else:
+            raw[_C_TOTAL] = raw[_C_USED] = raw[_C_FREE] = 0
+        # 数值更新完毕后再丢弃旧的模型对象
+        self._system_info = None
     
     def _check_low_disk_space(self) -> bool:
         """检查是否磁盘空间不足
@@ -177,93 +337,92 @@ class SchedulerService:
         Returns:
             是否空间不足
         """
-        # 如果未启用磁盘不足检测，直接返回False
-        if not self.config.get("schedule.scan_on_low_disk.enabled", True):
+        # 获取系统信息失败时各项为0，无法判断
+        raw = self._sysinfo_raw
+        disk_total = raw[_C_TOTAL]
+        if disk_total == 0:
             return False
         
-        # 获取阈值
-        threshold_percent = self.config.get("schedule.scan_on_low_disk.threshold_percent", 10)
+        cfg = self._schedule_cfg
+        # 如果未启用磁盘不足检测，直接返回False
+        if not cfg["low_disk_enabled"]:
+            return False
         
         # 计算剩余空间百分比
-        if self.system_info.c_drive_total > 0:
-            free_percent = (self.system_info.c_drive_free / self.system_info.c_drive_total) * 100
-            return free_percent < threshold_percent
-        
-        return False
+        free_percent = (raw[_C_FREE] / disk_total) * 100
+        return free_percent < cfg["low_disk_threshold_percent"]
     
     def _handle_low_disk_space(self):
         """处理磁盘空间不足的情况"""
-        logger.warning(f"C盘空间不足，剩余 {self.system_info.c_drive_free / (1024*1024*1024):.2f} GB")
+        logger.warning(f"C盘空间不足，剩余 {self._sysinfo_raw[_C_FREE] / (1024*1024*1024):.2f} GB")
         
-        # 检查是否有扫描或清理任务正在运行
-        if self.task_manager.scanner._is_scanning or self.task_manager.cleaner._is_cleaning:
+        # 冷却时间内已自动扫描过，避免空间在阈值附近徘徊时每次检测都触发扫描
+        now = time.monotonic()
+        cooldown = self._schedule_cfg["low_disk_cooldown_sec"]
+        if self._last_lowdisk_scan is not None and now - self._last_lowdisk_scan < cooldown:
+            logger.info(f"距上次磁盘不足自动扫描不足 {cooldown} 秒，跳过自动扫描")
+            return
+
+        # 没有扫描或清理任务运行时启动一次扫描任务（检查与启动为原子操作）
+        if not self.task_manager.start_scan_if_idle():
             logger.info("有任务正在运行，跳过自动扫描")
             return
+        logger.info("已自动启动扫描任务")
+        self._last_lowdisk_scan = now
         
-        # 启动一次扫描任务
-        logger.info("自动启动扫描任务")
-        self.task_manager.start_scan()
+    @classmethod
+    def _get_cron_triggers(cls) -> Dict[str, Any]:
+        """获取各定时任务的cron触发器
     
-    def _register_system_monitor(self):
-        """注册系统监控任务"""
-        # 每5分钟更新一次系统信息
-        self.add_task(
-            job_id="system_monitor",
-            func=self.update_system_info,
-            trigger=IntervalTrigger(minutes=5)
-        )
+        Returns:
+            {任务ID: CronTrigger} 字典
+        """
+        if cls._cron_triggers is None:
+            from apscheduler.triggers.cron import CronTrigger
+            cls._cron_triggers = {
+                "auto_scan": CronTrigger(hour=3, minute=0),
+                "auto_clean": CronTrigger(hour=4, minute=0),
+                "weekly_cleanup": CronTrigger(day_of_week="sun", hour=1, minute=0),
+            }
+        return cls._cron_triggers
     
-    def _register_auto_scan(self):
-        """注册自动扫描任务"""
-        # 检查是否启用
-        if not self.config.get("schedule.auto_scan.enabled", False):
-            return
+    def _build_registrations(self) -> List[Tuple[str, Callable, Any, Dict[str, Any]]]:
+        """根据配置生成需要注册的任务列表
         
-        # 获取间隔天数
-        interval_days = self.config.get("schedule.auto_scan.interval_days", 7)
+        Returns:
+            (任务ID, 任务函数, 触发器, add_job其他参数) 列表
+        """
+        from apscheduler.triggers.interval import IntervalTrigger
         
-        # 设置每天凌晨3点执行
-        self.add_task(
-            job_id="auto_scan",
-            func=self._run_auto_scan,
-            trigger=CronTrigger(hour=3, minute=0),
-            kwargs={"interval_days": interval_days}
-        )
+        triggers = self._get_cron_triggers()
+        registrations = [
+            # 每5分钟更新一次系统信息；磁盘不足时的自动扫描也由该任务触发，
+            # max_instances=1 保证上一次尚未结束时新的触发被丢弃
+            ("system_monitor", self.update_system_info, IntervalTrigger(minutes=5), {}),
+        ]
     
-    def _register_auto_clean(self):
-        """注册自动清理任务"""
-        # 检查是否启用
-        if not self.config.get("schedule.auto_clean.enabled", False):
-            return
+        cfg = self._schedule_cfg
+        # 自动扫描：每天凌晨3点检查是否达到间隔天数
+        if cfg["auto_scan_enabled"]:
+            interval_days = cfg["auto_scan_interval_days"]
+            registrations.append((
+                "auto_scan", self._run_auto_scan, triggers["auto_scan"],
+                {"kwargs": {"interval_days": interval_days}}
+            ))
         
-        # 获取间隔天数
-        interval_days = self.config.get("schedule.auto_clean.interval_days", 14)
+        # 自动清理：每天凌晨4点检查是否达到间隔天数
+        if cfg["auto_clean_enabled"]:
+            interval_days = cfg["auto_clean_interval_days"]
+            registrations.append((
+                "auto_clean", self._run_auto_clean, triggers["auto_clean"],
+                {"kwargs": {"interval_days": interval_days}}
+            ))
         
-        # 设置每天凌晨4点执行
-        self.add_task(
-            job_id="auto_clean",
-            func=self._run_auto_clean,
-            trigger=CronTrigger(hour=4, minute=0),
-            kwargs={"interval_days": interval_days}
-        )
-    
-    def _register_cleanup_old_backups(self):
-        """注册清理旧备份任务"""
-        # 每周日凌晨2点执行
-        self.add_task(
-            job_id="cleanup_old_backups",
-            func=self._run_cleanup_old_backups,
-            trigger=CronTrigger(day_of_week="sun", hour=2, minute=0)
-        )
-    
-    def _register_cleanup_logs(self):
-        """注册清理日志任务"""
-        # 每周日凌晨1点执行
-        self.add_task(
-            job_id="cleanup_logs",
-            func=self._run_cleanup_logs,
-            trigger=CronTrigger(day_of_week="sun", hour=1, minute=0)
-        )
+        # 每周日凌晨1点依次清理过期日志和旧备份
+        registrations.append((
+            "weekly_cleanup", self._run_weekly_cleanup, triggers["weekly_cleanup"], {}
+        ))
+        return registrations
     
     def _run_auto_scan(self, interval_days: int):
         """运行自动扫描任务
@@ -273,26 +432,22 @@ class SchedulerService:
         """
         # 检查上次扫描时间
         try:
-            # 获取最近的扫描结果
-            recent_scans = self.task_manager.list_scan_results(limit=1)
+            # 获取最近一次扫描的时间
+            last_scan_time = self.task_manager.get_last_scan_time()
             
-            if recent_scans:
-                last_scan_time = recent_scans[0]["start_time"]
-                days_since_last = (datetime.now() - last_scan_time).days
+            if last_scan_time is not None:
+                seconds_since_last = time.time() - last_scan_time
                 
                 # 如果距离上次扫描不足间隔天数，则跳过
-                if days_since_last < interval_days:
-                    logger.info(f"距离上次扫描仅 {days_since_last} 天，未达到间隔 {interval_days} 天，跳过自动扫描")
+                if seconds_since_last < interval_days * SECONDS_PER_DAY:
+                    logger.info(f"距离上次扫描仅 {int(seconds_since_last // SECONDS_PER_DAY)} 天，未达到间隔 {interval_days} 天，跳过自动扫描")
                     return
             
-            # 检查是否有任务正在运行
-            if self.task_manager.scanner._is_scanning or self.task_manager.cleaner._is_cleaning:
+            # 没有任务运行时启动扫描任务
+            if not self.task_manager.start_scan_if_idle():
                 logger.info("有任务正在运行，跳过自动扫描")
                 return
-            
-            # 启动扫描任务
-            logger.info("自动启动扫描任务")
-            self.task_manager.start_scan()
+            logger.info("已自动启动扫描任务")
             
         except Exception as e:
             logger.error(f"自动扫描任务失败: {e}")
@@ -305,20 +460,19 @@ class SchedulerService:
         """
         # 检查上次清理时间
         try:
-            # 获取最近的清理任务
-            recent_tasks = self.task_manager.list_clean_tasks(limit=1)
+            # 获取最近一次清理的时间
+            last_clean_time = self.task_manager.get_last_clean_time()
             
-            if recent_tasks:
-                last_clean_time = recent_tasks[0]["created_time"]
-                days_since_last = (datetime.now() - last_clean_time).days
+            if last_clean_time is not None:
+                seconds_since_last = time.time() - last_clean_time
                 
                 # 如果距离上次清理不足间隔天数，则跳过
-                if days_since_last < interval_days:
-                    logger.info(f"距离上次清理仅 {days_since_last} 天，未达到间隔 {interval_days} 天，跳过自动清理")
+                if seconds_since_last < interval_days * SECONDS_PER_DAY:
+                    logger.info(f"距离上次清理仅 {int(seconds_since_last // SECONDS_PER_DAY)} 天，未达到间隔 {interval_days} 天，跳过自动清理")
                     return
             
             # 检查是否有任务正在运行
-            if self.task_manager.scanner._is_scanning or self.task_manager.cleaner._is_cleaning:
+            if self.task_manager.is_busy():
                 logger.info("有任务正在运行，跳过自动清理")
                 return
             
@@ -329,20 +483,27 @@ class SchedulerService:
                 return
             
             # 启动清理任务，清理临时文件和缓存
-            logger.info("自动启动清理任务")
             categories = [
                 "temp_files",
                 "browser_cache",
                 "windows_cache"
             ]
-            self.task_manager.start_clean_task(
+            if not self.task_manager.start_clean_task_if_idle(
                 scan_id=recent_scans[0]["scan_id"],
                 categories=categories,
                 create_backup=True
-            )
+            ):
+                logger.info("有任务正在运行或启动失败，跳过自动清理")
+                return
+            logger.info("已自动启动清理任务")
             
         except Exception as e:
             logger.error(f"自动清理任务失败: {e}")
+
+    def _run_weekly_cleanup(self):
+        """运行每周维护任务：在同一线程中依次清理过期日志和旧备份"""
+        self._run_cleanup_logs()
+        self._run_cleanup_old_backups()
     
     def _run_cleanup_old_backups(self):
         """运行清理旧备份任务"""
@@ -361,19 +522,32 @@ class SchedulerService:
         """运行清理日志任务"""
         try:
             # 清理30天前的日志
-            from data.database import Database
-            db = Database()
-            count = db.clear_logs(30)
-            db.close()
+            count = self._get_database().clear_logs(30)
             
             logger.info(f"已清理 {count} 条过期日志")
             
         except Exception as e:
             logger.error(f"清理日志任务失败: {e}")
     
+    def _get_database(self) -> Database:
+        """获取数据库连接，优先复用任务管理器的连接
+
+        Returns:
+            数据库实例
+        """
+        db = getattr(self.task_manager, "db", None)
+        if db is not None and getattr(db, "conn", None) is not None:
+            return db
+        if self._db is None:
+            self._db = Database()
+        return self._db
+
     def close(self):
         """关闭调度器服务"""
         self.stop()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
         if self.task_manager:
             self.task_manager.close()
         logger.info("调度器服务已关闭")
\ No newline at end of file
@@ -5,11 +5,21 @@
 任务管理器 - 管理扫描和清理任务
 """
 
+import os
+import queue
+import functools
+import shutil
+import asyncio
 import uuid
 import time
-from typing import List, Dict, Optional, Union, Any, Tuple
+import stat
+import threading
+import weakref
+from collections import deque
+from typing import List, Dict, Set, Iterator, Optional, Union, Any, Tuple
 from datetime import datetime
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from loguru import logger
 
 # New imports
@@ -24,6 +34,181 @@ from data.models import FileItem, ScanResult, CleanTask, CleanCategory
 from data.database import Database
 from config.manager import ConfigManager
 
+# 最近一次扫描/清理时间的进程内缓存有效期（秒）
+LAST_RUN_CACHE_TTL = 60
+# 清理任务/备份等只读查询结果的缓存有效期（秒），相关写操作会使缓存立即失效
+READ_CACHE_TTL = 30
+# 遍历全部清理历史时每批从数据库读取的记录数
+CLEAN_TASK_PAGE_SIZE = 200
+# 已结束的清理任务状态，这类任务不会再变化
+FINISHED_CLEAN_STATUSES = frozenset({"completed", "failed", "stopped"})
+
+# AI规划任务等待扫描/清理结束时输出进度日志的间隔（秒）
+PROGRESS_LOG_INTERVAL = 2.0
+
+# 按修改时间批量删除旧文件时的并发线程数
+DELETE_WORKERS = 32
+# 批量删除时同时提交、尚未取回结果的任务上限
+DELETE_PENDING_LIMIT = DELETE_WORKERS * 4
+# 批量删除失败时最多逐条记录的数量，其余只计入汇总
+FAILURE_LOG_LIMIT = 10
+
+# 补全AI计划action时按压缩包处理的扩展名（.tar.gz 等复合扩展名已被 .gz 等覆盖），常见的排在前面
+COMPRESS_EXTS = ('.zip', '.rar', '.7z', '.gz', '.iso', '.tar', '.xz', '.bz2', '.cab', '.jar', '.apk', '.arj', '.lzh', '.ace', '.uue', '.z')
+# 匹配时只需将路径末尾这么多字符转为小写
+COMPRESS_EXT_MAX_LEN = max(len(ext) for ext in COMPRESS_EXTS)
+
+
+def _delete_if_old(path: str, mtime: float, cutoff: float) -> Tuple[str, bool, Optional[str]]:
+    """修改时间早于cutoff时删除文件
+
+    Args:
+        path: 文件路径
+        mtime: 遍历时已获取的修改时间
+        cutoff: 修改时间阈值（时间戳）
+
+    Returns:
+        (路径, 是否已删除, 错误信息)
+    """
+    if mtime >= cutoff:
+        return path, False, None
+    try:
+        os.remove(path)
+        return path, True, None
+    except OSError as e:
+        return path, False, str(e)
+
+
+def _walk_entries(root_path: str) -> Iterator[os.DirEntry]:
+    """递归遍历目录，产出所有DirEntry（不跟随符号链接，无法访问的目录跳过）"""
+    try:
+        with os.scandir(root_path) as it:
+            entries = list(it)
+    except OSError:
+        return
+    for entry in entries:
+        yield entry
+        try:
+            is_dir = entry.is_dir(follow_symlinks=False)
+        except OSError:
+            continue
+        if is_dir:
+            yield from _walk_entries(entry.path)
+
+
+def _delete_old_tree(root_path: str, cutoff: float) -> Tuple[int, List[Tuple[str, str]]]:
+    """并发删除目录树中修改时间早于cutoff的文件，随后删除已清空的旧子目录
+
+    Args:
+        root_path: 根目录（自身不删除）
+        cutoff: 修改时间阈值（时间戳）
+
+    Returns:
+        (删除的文件和目录数, [(失败路径, 错误信息), ...])
+    """
+    # 子目录的修改时间需在删除文件前记录，删除文件会更新目录的修改时间
+    old_dirs = []
+
+    def _iter_files():
+        # DirEntry.stat 复用目录枚举时获取的信息（Windows上无需额外系统调用），每个条目只stat一次
+        for entry in _walk_entries(root_path):
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if stat.S_ISDIR(st.st_mode):
+                if st.st_mtime < cutoff:
+                    old_dirs.append(entry.path)
+            else:
+                yield entry.path, st.st_mtime
+
+    deleted_count = 0
+    failures: List[Tuple[str, str]] = []
+
+    def _collect(future):
+        nonlocal deleted_count
+        file_path, deleted, err = future.result()
+        if deleted:
+            deleted_count += 1
+        elif err:
+            failures.append((file_path, err))
+
+    # 边遍历边提交，进行中的任务不超过DELETE_PENDING_LIMIT个，不会把整棵目录树一次性放进队列
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=DELETE_WORKERS) as executor:
+        for file_path, mtime in _iter_files():
+            if len(pending) >= DELETE_PENDING_LIMIT:
+                _collect(pending.popleft())
+            pending.append(executor.submit(_delete_if_old, file_path, mtime, cutoff))
+        while pending:
+            _collect(pending.popleft())
+
+    # 深层目录先删，只删除已为空的旧目录
+    for dir_path in sorted(old_dirs, key=len, reverse=True):
+        try:
+            os.rmdir(dir_path)
+            deleted_count += 1
+        except OSError:
+            pass
+    return deleted_count, failures
+
+
+def _move_if_same_filesystem(path: str, st: os.stat_result, backup_dir: str, backup_path: str) -> bool:
+    """源路径与备份目录位于同一文件系统时，用重命名代替复制+删除完成备份
+
+    Args:
+        path: 源文件或目录
+        st: 源路径的stat结果
+        backup_dir: 备份目录（需已存在）
+        backup_path: 备份目标路径
+
+    Returns:
+        是否已移动（False表示需要调用方复制并删除）
+    """
+    backup_st = _safe_stat(backup_dir)
+    if backup_st is None or backup_st.st_dev != st.st_dev:
+        return False
+    try:
+        os.rename(path, backup_path)
+        return True
+    except OSError:
+        return False
+
+
+# 类别字符串到CleanCategory的映射，同时接受枚举值（如 "temp_files"）和名称（如 "TEMP_FILES"）
+_CATEGORY_CACHE: Dict[str, CleanCategory] = {m.value: m for m in CleanCategory}
+_CATEGORY_CACHE.update(CleanCategory.__members__)
+
+
+def _parse_categories(categories: Optional[List[str]]) -> frozenset:
+    """将类别字符串（值或名称）转换为CleanCategory集合，忽略无法识别的类别"""
+    if not categories:
+        return frozenset()
+    return frozenset(_CATEGORY_CACHE[c] for c in categories if c in _CATEGORY_CACHE)
+
+
+def _safe_stat(path: str) -> Optional[os.stat_result]:
+    """获取路径状态，路径不存在、无法访问或不是字符串时返回None"""
+    if not isinstance(path, str):
+        return None
+    try:
+        return os.stat(path)
+    except (OSError, ValueError):
+        return None
+
+
+def _safe_close(resource: Any, name: str):
+    """关闭资源，出错时只记录日志；供 weakref.finalize 调用，每个资源只会执行一次
+
+    Args:
+        resource: 带 close() 方法的资源
+        name: 资源名称，用于日志
+    """
+    try:
+        resource.close()
+    except Exception as e:
+        logger.opt(exception=True).error("关闭{}时出错: {}", name, e)
+
 
 class TaskManager:
     """任务管理器类，统一管理扫描和清理任务"""
@@ -43,15 +228,27 @@ class TaskManager:
             config_manager = ConfigManager()
         self.config = config_manager or ConfigManager()
         self.db = database or Database()
+        # 资源关闭由finalize保证只执行一次：close() 时主动触发，未调用 close() 时在对象回收时执行；
+        # 调用方传入的数据库可能与其他服务共用（如调度器），由调用方负责关闭
+        self._db_finalizer = None
+        if database is None:
+            self._db_finalizer = weakref.finalize(self, _safe_close, self.db, "数据库连接")
 
         # 初始化日志服务和任务管理器的日志记录器
+        self.logger_service = None
+        self._logger_finalizer = None
         try:
-            from services.logger import LoggerService  # Delayed import to avoid circular import
-            self.logger_service = LoggerService(config_manager=self.config, database=self.db)
+            from services.logger import get_logger_service  # Delayed import to avoid circular import
+            # 使用进程内共享的日志服务，避免重复创建时移除其他模块添加的全局sink
+            self.logger_service = get_logger_service()
             self.logger = self.logger_service.get_logger(__name__)
+            # 共享日志服务还没有数据库sink时由本实例添加，关闭时只移除自己添加的sink；
+            # 后注册的finalizer先执行，回收时日志服务先于数据库关闭
+            if self.logger_service.attach_database(self.db):
+                self._logger_finalizer = weakref.finalize(self, _safe_close, self.logger_service, "日志服务")
         except Exception as e:
             self.logger = logger # Use global loguru logger as fallback
-            self.logger.error(f"TaskManager failed to initialize its own LoggerService, falling back to global logger: {e}", exc_info=True)
+            self.logger.opt(exception=True).error(f"TaskManager failed to initialize its own LoggerService, falling back to global logger: {e}")
 
         # 初始化AI规划服务
         if ai_planner_service:
@@ -62,7 +259,7 @@ class TaskManager:
             try:
                 self.ai_planner = AIPlannerService(config_manager=self.config)
             except Exception as e:
-                self.logger.error(f"TaskManager failed to initialize AIPlannerService internally: {e}", exc_info=True)
+                self.logger.opt(exception=True).error(f"TaskManager failed to initialize AIPlannerService internally: {e}")
                 self.ai_planner = None
 
         # 初始化子模块
@@ -75,6 +272,20 @@ class TaskManager:
         self.current_scan_id: Optional[str] = None # Type hint added
         self.current_clean_id: Optional[str] = None # Type hint added
         self.current_ai_task_id: Optional[str] = None # Added for AI-driven tasks
+
+        # 保证"检查空闲 + 启动任务"是原子操作，避免并发的定时任务同时启动
+        self._start_lock = threading.Lock()
+
+        # 最近一次扫描/清理的时间缓存: {"scan"/"clean": (缓存时间, 时间戳或None)}
+        self._last_run_cache: Dict[str, Tuple[float, Optional[float]]] = {}
+
+        # 只读查询缓存: {键: (写入时的版本号, 缓存时间, 结果)}，任何相关写操作都会递增版本号
+        self._read_cache: Dict[Any, Tuple[int, float, Any]] = {}
+        self._cache_epoch = 0
+        # 已结束的清理任务不会再变化，单独缓存，不受版本号影响
+        self._finished_clean_tasks: Dict[str, CleanTask] = {}
+        # 已把结束状态写入数据库的清理任务ID
+        self._persisted_clean_id: Optional[str] = None
     
     def start_ai_planned_task(self, user_goal: str, current_context: Optional[Dict[str, Any]] = None, precomputed_plan: Optional[Dict[str, Any]] = None) -> Optional[str]:
         """
@@ -108,7 +319,7 @@ class TaskManager:
             try:
                 plan = self.ai_planner.generate_plan(user_goal=user_goal, current_context=current_context)
             except Exception as e:
-                self.logger.error(f"AI规划任务 {self.current_ai_task_id}: 生成计划时发生错误: {e}", exc_info=True)
+                self.logger.opt(exception=True).error(f"AI规划任务 {self.current_ai_task_id}: 生成计划时发生错误: {e}")
                 return None
 
         if not plan or not isinstance(plan, dict) or "steps" not in plan or not isinstance(plan.get("steps"), list):
@@ -118,23 +329,40 @@ class TaskManager:
         self.logger.info(f"AI规划任务 {self.current_ai_task_id} 收到AI计划: {plan}")
         
         # === 本地补全 action 字段 ===
-        import os
-        compress_exts = ('.zip', '.rar', '.7z', '.tar', '.gz', '.bz2', '.xz', '.iso', '.cab', '.arj', '.lzh', '.z', '.ace', '.uue', '.jar', '.apk', '.tar.gz', '.tar.bz2', '.tar.xz')
-        for step in plan.get("steps", []):
-            if "action" not in step or not step["action"]:
-                path = step.get("path")
-                safety = step.get("safety")
-                if not path or safety == "forbid":
-                    step["action"] = None
-                elif os.path.isdir(path):
-                    step["action"] = "delete_dir"
-                elif os.path.isfile(path):
-                    step["action"] = "delete_file"
-                elif isinstance(path, str) and path.lower().endswith(compress_exts):
-                    step["action"] = "delete_file"
-                else:
-                    # 路径不存在，无法判断，action为None
-                    step["action"] = None
+        # 每个路径只stat一次，补全action与后续delete_file/delete_dir步骤共用结果
+        stat_cache: Dict[str, Optional[os.stat_result]] = {}
+
+        def _stat(p: str) -> Optional[os.stat_result]:
+            if p not in stat_cache:
+                stat_cache[p] = _safe_stat(p)
+            return stat_cache[p]
+
+        def _forget_stat(p: str, tree: bool = False) -> None:
+            """删除操作后丢弃路径的stat缓存；tree为True时一并丢弃其下所有路径"""
+            stat_cache.pop(p, None)
+            if tree:
+                prefix = os.path.join(p, "")
+                for cached in [c for c in stat_cache if c.startswith(prefix)]:
+                    del stat_cache[cached]
+
+        for step in plan["steps"]:
+            if step.get("action"):
+                continue
+            path = step.get("path")
+            if not path or step.get("safety") == "forbid":
+                step["action"] = None
+                continue
+            st = _stat(path)
+            mode = st.st_mode if st is not None else 0
+            if stat.S_ISDIR(mode):
+                step["action"] = "delete_dir"
+            elif stat.S_ISREG(mode):
+                step["action"] = "delete_file"
+            elif isinstance(path, str) and path[-COMPRESS_EXT_MAX_LEN:].lower().endswith(COMPRESS_EXTS):
+                step["action"] = "delete_file"
+            else:
+                # 路径不存在，无法判断，action为None
+                step["action"] = None
 
         # === 聊天功能：如果steps为空，尝试输出chat内容 ===
         if not plan.get("steps"):
@@ -145,11 +373,34 @@ class TaskManager:
                 self.logger.info("AI未提供清理建议，请检查输入或重试。")
 
         last_scan_id: Optional[str] = None # To store the ID of the most recent scan action
+        # 与前一个扫描步骤流水线并行、已提前启动的清理步骤：(步骤序号, 清理任务ID)
+        streamed_clean: Optional[Tuple[int, str]] = None
+
+        # 本次任务内复用已加载的扫描结果，清理完成后失效（文件已被删除）
+        scan_result_cache: Dict[str, ScanResult] = {}
+
+        def _get_scan_result(sid: str) -> Optional[ScanResult]:
+            result = scan_result_cache.get(sid)
+            if result is None:
+                result = self.get_scan_result(sid)
+                if result is not None and result.is_complete:
+                    scan_result_cache[sid] = result
+            return result
+
+        # 步骤循环内频繁使用的属性提前绑定为局部变量，用到的配置在任务开始时读取一次
+        log = self.logger
+        ai_task_id = self.current_ai_task_id
+        cfg = {
+            "include_dirs": self.config.get("scanner.include_dirs", []),
+            "exclude_dirs": self.config.get("scanner.exclude_dirs", []),
+            "backup_enabled": self.config.get("safety.backup.enabled", True),
+            "backup_dir": self.config.get("safety.backup.directory", "./backups"),
+        }
 
         for step_num, step in enumerate(plan.get("steps", [])):
             action = step.get("action")
             parameters = step.get("parameters", {})
-            self.logger.info(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}/{len(plan['steps'])}: 执行 '{action}'，参数: {parameters}")
+            log.info(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}/{len(plan['steps'])}: 执行 '{action}'，参数: {parameters}")
 
             try:
                 if action == "scan_paths":
@@ -157,121 +408,141 @@ class TaskManager:
                     exclude_paths_param = parameters.get("exclude_paths")
                     
                     if not scan_paths_param: # If AI doesn't specify, use config defaults
-                        scan_paths_param = self.config.get("scanner.include_dirs", [])
+                        scan_paths_param = list(cfg["include_dirs"])
                     if not exclude_paths_param: # If AI doesn't specify, use config defaults
-                        exclude_paths_param = self.config.get("scanner.exclude_dirs", [])
+                        exclude_paths_param = list(cfg["exclude_dirs"])
 
-                    scan_id = self.start_scan(scan_paths=scan_paths_param, exclude_paths=exclude_paths_param)
+                    # 紧随其后的清理步骤标记了 stream 且可以安全流式执行时，边扫描边清理
+                    steps = plan["steps"]
+                    next_step = steps[step_num + 1] if step_num + 1 < len(steps) else None
+                    batch_queue = None
+                    if next_step and next_step.get("action") == "perform_cleanup":
+                        next_params = next_step.get("parameters", {})
+                        next_backup = next_params.get("create_backup")
+                        if next_backup is None:
+                            next_backup = cfg["backup_enabled"]
+                        if next_params.get("stream") and self.can_stream_clean(next_params.get("categories"), next_backup):
+                            batch_queue = queue.Queue()
+
+                    scan_id = self.start_scan(scan_paths=scan_paths_param, exclude_paths=exclude_paths_param, batch_queue=batch_queue)
                     if scan_id:
                         last_scan_id = scan_id # Store this scan_id
-                        self.logger.info(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: '{action}' 启动扫描: {scan_id}")
-                        while self.is_scan_active():
-                            time.sleep(1) # Wait a bit before checking progress
-                            progress_data = self.get_scan_progress()
-                            self.logger.info(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: 扫描 {scan_id} 进行中 - {progress_data.get('progress', 0.0)*100:.2f}%")
+                        log.info(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: '{action}' 启动扫描: {scan_id}")
+                        if batch_queue is not None:
+                            streamed_id = self.start_streaming_clean_task(
+                                batch_queue,
+                                categories=next_params.get("categories"),
+                                task_name=next_params.get("task_name", f"AI_Clean_{ai_task_id}_Step{step_num+2}")
+                            )
+                            if streamed_id:
+                                streamed_clean = (step_num + 1, streamed_id)
+                                log.info(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: 已启动与扫描并行的流式清理 {streamed_id}")
+                        while not self.wait_scan(timeout=PROGRESS_LOG_INTERVAL):
+                            # 惰性求值：日志级别过滤掉INFO时不查询进度也不格式化
+                            log.opt(lazy=True).info(
+                                "AI规划任务 {} - 步骤 {}: 扫描 {} 进行中 - {:.2f}%",
+                                lambda: ai_task_id, lambda: step_num + 1, lambda: scan_id,
+                                lambda: self.get_scan_progress().get('progress', 0.0) * 100
+                            )
                         
-                        self.save_scan_result() 
-                        scan_result_check = self.get_scan_result(scan_id)
+                        # 扫描结束后的保存与读取在一个短事务内完成，不包住上面的等待
+                        with self.db.batch():
+                            self.save_scan_result()
+                            scan_result_check = _get_scan_result(scan_id)
                         if scan_result_check and scan_result_check.is_complete:
-                            self.logger.info(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: 扫描 {scan_id} 已完成。")
+                            log.info(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: 扫描 {scan_id} 已完成。")
                         else:
-                            self.logger.error(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: 扫描 {scan_id} 未成功完成或未找到结果。")
+                            log.error(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: 扫描 {scan_id} 未成功完成或未找到结果。")
                     else:
-                        self.logger.error(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: '{action}' 启动扫描失败。")
+                        log.error(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: '{action}' 启动扫描失败。")
 
                 elif action == "perform_cleanup":
                     if not last_scan_id:
-                        self.logger.error(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: '{action}' 需要一个 scan_id，但当前没有可用的。")
+                        log.error(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: '{action}' 需要一个 scan_id，但当前没有可用的。")
                         continue
 
                     categories_to_clean = parameters.get("categories")
                     create_backup_param = parameters.get("create_backup")
-                    task_name_param = parameters.get("task_name", f"AI_Clean_{self.current_ai_task_id}_Step{step_num+1}")
+                    task_name_param = parameters.get("task_name", f"AI_Clean_{ai_task_id}_Step{step_num+1}")
 
                     if create_backup_param is None:
-                        create_backup_param = self.config.get("safety.backup.enabled", True)
+                        create_backup_param = cfg["backup_enabled"]
                     
-                    clean_task_id = self.start_clean_task(
-                        scan_id=last_scan_id,
-                        categories=categories_to_clean,
-                        create_backup=create_backup_param,
-                        task_name=task_name_param
-                    )
+                    if streamed_clean and streamed_clean[0] == step_num:
+                        # 已在扫描步骤中以流式方式启动，这里只需等待其完成
+                        clean_task_id = streamed_clean[1]
+                        streamed_clean = None
+                    else:
+                        clean_task_id = self.start_clean_task(
+                            scan_id=last_scan_id,
+                            categories=categories_to_clean,
+                            create_backup=create_backup_param,
+                            task_name=task_name_param,
+                            scan_result=_get_scan_result(last_scan_id)
+                        )
                     if clean_task_id:
-                        self.logger.info(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: '{action}' 启动清理任务: {clean_task_id}")
-                        while self.is_clean_active():
-                            time.sleep(1)
-                            progress_data = self.get_clean_progress()
-                            self.logger.info(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: 清理 {clean_task_id} 进行中 - {progress_data.get('progress', 0.0)*100:.2f}%")
+                        log.info(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: '{action}' 启动清理任务: {clean_task_id}")
+                        while not self.wait_clean(timeout=PROGRESS_LOG_INTERVAL):
+                            # 惰性求值：日志级别过滤掉INFO时不查询进度也不格式化
+                            log.opt(lazy=True).info(
+                                "AI规划任务 {} - 步骤 {}: 清理 {} 进行中 - {:.2f}%",
+                                lambda: ai_task_id, lambda: step_num + 1, lambda: clean_task_id,
+                                lambda: self.get_clean_progress().get('progress', 0.0) * 100
+                            )
+                        scan_result_cache.pop(last_scan_id, None)
+                        # 清理可能删除了任意已stat过的路径，之后的步骤重新获取
+                        stat_cache.clear()
                         
-                        final_clean_task = self.get_clean_task(clean_task_id)
+                        # 清理结束后写入任务最终状态，同样只包住这次写入
+                        with self.db.batch():
+                            final_clean_task = self.get_clean_task(clean_task_id)
                         if final_clean_task and final_clean_task.status == "completed":
-                             self.logger.info(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: 清理任务 {clean_task_id} 已完成。")
+                             log.info(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: 清理任务 {clean_task_id} 已完成。")
                         else:
                             status_msg = final_clean_task.status if final_clean_task else "未知"
-                            self.logger.error(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: 清理任务 {clean_task_id} 未成功完成。状态: {status_msg}")
+                            log.error(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: 清理任务 {clean_task_id} 未成功完成。状态: {status_msg}")
                     else:
-                        self.logger.error(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: '{action}' 启动清理任务失败。")
+                        log.error(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: '{action}' 启动清理任务失败。")
                 
                 elif action == "identify_file_categories":
-                    self.logger.info(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: AI步骤 '{action}': 计划建议关注类别: {parameters.get('categories')}. 这可能会影响后续的清理选择。")
+                    log.info(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: AI步骤 '{action}': 计划建议关注类别: {parameters.get('categories')}. 这可能会影响后续的清理选择。")
 
                 elif action == "suggest_deletions":
                     if last_scan_id:
-                        scan_result_for_suggestion = self.get_scan_result(last_scan_id)
+                        scan_result_for_suggestion = _get_scan_result(last_scan_id)
                         if scan_result_for_suggestion:
-                            self.logger.info(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: AI步骤 '{action}': 基于扫描 {last_scan_id} 建议删除。结果包含 {scan_result_for_suggestion.total_items} 个项目。UI应处理呈现。")
+                            log.info(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: AI步骤 '{action}': 基于扫描 {last_scan_id} 建议删除。结果包含 {scan_result_for_suggestion.total_items} 个项目。UI应处理呈现。")
                         else:
-                            self.logger.warning(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: AI步骤 '{action}': 未找到扫描 {last_scan_id} 的结果以建议删除。")
+                            log.warning(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: AI步骤 '{action}': 未找到扫描 {last_scan_id} 的结果以建议删除。")
                     else:
-                        self.logger.warning(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: AI步骤 '{action}': 没有可用的扫描ID来建议删除。")
+                        log.warning(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: AI步骤 '{action}': 没有可用的扫描ID来建议删除。")
                 
                 elif action == "delete":
                     # 兼容AI直接输出的delete动作
                     path = step.get("path")
                     older_than_days = step.get("older_than_days", 90)
                     if not path:
-                        self.logger.warning(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: 'delete' 缺少 path，跳过。")
+                        log.warning(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: 'delete' 缺少 path，跳过。")
                         continue
                     try:
-                        import os
-                        import shutil
-                        import time
-                        from datetime import datetime, timedelta
-                        if os.path.isdir(path):
-                            # 只删除目录下90天前的文件/子目录
-                            cutoff = time.time() - older_than_days * 24 * 3600
-                            deleted_count = 0
-                            for root, dirs, files in os.walk(path):
-                                for name in files:
-                                    file_path = os.path.join(root, name)
-                                    try:
-                                        if os.path.getmtime(file_path) < cutoff:
-                                            os.remove(file_path)
-                                            deleted_count += 1
-                                            self.logger.info(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: 已删除旧文件 {file_path}")
-                                    except Exception as e:
-                                        self.logger.warning(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: 删除文件 {file_path} 失败: {e}")
-                                for name in dirs:
-                                    dir_path = os.path.join(root, name)
-                                    try:
-                                        if os.path.getmtime(dir_path) < cutoff:
-                                            shutil.rmtree(dir_path, ignore_errors=True)
-                                            deleted_count += 1
-                                            self.logger.info(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: 已删除旧目录 {dir_path}")
-                                    except Exception as e:
-                                        self.logger.warning(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: 删除目录 {dir_path} 失败: {e}")
-                            self.logger.info(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: 目录 {path} 下共删除 {deleted_count} 个90天前的文件/目录")
-                        else:
-                            # 单文件直接删除
-                            if os.path.exists(path):
-                                if os.path.getmtime(path) < time.time() - older_than_days * 24 * 3600:
-                                    os.remove(path)
-                                    self.logger.info(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: 已删除旧文件 {path}")
-                                else:
-                                    self.logger.info(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: 文件 {path} 未满90天，未删除")
+                        st = _stat(path)
+                        cutoff = time.time() - older_than_days * 24 * 3600
+                        if st is not None and stat.S_ISDIR(st.st_mode):
+                            # 只删除目录下older_than_days天前的文件/子目录
+                            deleted_count, failures = _delete_old_tree(path, cutoff)
+                            for failed_path, err in failures[:FAILURE_LOG_LIMIT]:
+                                log.warning(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: 删除 {failed_path} 失败: {err}")
+                            log.info(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: 目录 {path} 下共删除 {deleted_count} 个{older_than_days}天前的文件/目录，失败 {len(failures)} 个")
+                        elif st is not None:
+                            # 单文件直接删除，复用已缓存的stat结果判断修改时间
+                            if st.st_mtime < cutoff:
+                                os.unlink(path)
+                                log.info(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: 已删除旧文件 {path}")
+                            else:
+                                log.info(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: 文件 {path} 未满{older_than_days}天，未删除")
                     except Exception as e:
-                        self.logger.error(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: 删除 {path} 失败: {e}")
+                        log.error(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: 删除 {path} 失败: {e}")
+                    _forget_stat(path, tree=True)
                 
                 elif action == "delete_dir":
                     # 删除目录操作
@@ -280,40 +551,40 @@ class TaskManager:
                     create_backup = parameters.get("create_backup", True)
                     
                     if not path:
-                        self.logger.warning(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: 'delete_dir' 缺少 path，跳过。")
+                        log.warning(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: 'delete_dir' 缺少 path，跳过。")
                         continue
                     
-                    if not os.path.exists(path):
-                        self.logger.warning(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: 目录 {path} 不存在，跳过。")
+                    st = _stat(path)
+                    if st is None:
+                        log.warning(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: 目录 {path} 不存在，跳过。")
                         continue
                     
-                    if not os.path.isdir(path):
-                        self.logger.warning(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: {path} 不是目录，跳过。")
+                    if not stat.S_ISDIR(st.st_mode):
+                        log.warning(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: {path} 不是目录，跳过。")
                         continue
                     
                     try:
-                        import os
-                        import shutil
-                        from pathlib import Path
                         
-                        # 创建备份（如果启用）
+                        # 创建备份（如果启用）；与备份目录同一文件系统时直接移动，无需复制后再删除
+                        moved = False
                         if create_backup:
-                            backup_dir = self.config.get("safety.backup.directory", "./backups")
+                            backup_dir = cfg["backup_dir"]
                             backup_path = os.path.join(backup_dir, f"backup_{os.path.basename(path)}_{int(time.time())}")
                             os.makedirs(backup_dir, exist_ok=True)
-                            shutil.copytree(path, backup_path)
-                            self.logger.info(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: 已创建目录备份: {backup_path}")
+                            moved = _move_if_same_filesystem(path, st, backup_dir, backup_path)
+                            if not moved:
+                                shutil.copytree(path, backup_path)
+                            log.info(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: 已创建目录备份: {backup_path}")
                         
-                        # 删除目录
-                        if force_delete:
-                            shutil.rmtree(path, ignore_errors=True)
-                        else:
-                            shutil.rmtree(path)
+                        # 删除目录（已移动到备份目录时无需再删除）
+                        if not moved:
+                            shutil.rmtree(path, ignore_errors=force_delete)
                         
-                        self.logger.info(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: 已删除目录 {path}")
+                        log.info(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: 已删除目录 {path}")
                         
                     except Exception as e:
-                        self.logger.error(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: 删除目录 {path} 失败: {e}")
+                        log.error(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: 删除目录 {path} 失败: {e}")
+                    _forget_stat(path, tree=True)
                 
                 elif action == "delete_file":
                     # 删除文件操作
@@ -321,67 +592,127 @@ class TaskManager:
                     create_backup = parameters.get("create_backup", True)
                     
                     if not path:
-                        self.logger.warning(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: 'delete_file' 缺少 path，跳过。")
+                        log.warning(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: 'delete_file' 缺少 path，跳过。")
                         continue
                     
-                    if not os.path.exists(path):
-                        self.logger.warning(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: 文件 {path} 不存在，跳过。")
+                    st = _stat(path)
+                    if st is None:
+                        log.warning(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: 文件 {path} 不存在，跳过。")
                         continue
                     
-                    if not os.path.isfile(path):
-                        self.logger.warning(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: {path} 不是文件，跳过。")
+                    if not stat.S_ISREG(st.st_mode):
+                        log.warning(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: {path} 不是文件，跳过。")
                         continue
                     
                     try:
-                        import os
-                        import shutil
-                        from pathlib import Path
                         
-                        # 创建备份（如果启用）
+                        # 创建备份（如果启用）；与备份目录同一文件系统时直接移动，无需复制后再删除
+                        moved = False
                         if create_backup:
-                            backup_dir = self.config.get("safety.backup.directory", "./backups")
+                            backup_dir = cfg["backup_dir"]
                             backup_filename = f"backup_{os.path.basename(path)}_{int(time.time())}"
                             backup_path = os.path.join(backup_dir, backup_filename)
                             os.makedirs(backup_dir, exist_ok=True)
-                            shutil.copy2(path, backup_path)
-                            self.logger.info(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: 已创建文件备份: {backup_path}")
+                            moved = _move_if_same_filesystem(path, st, backup_dir, backup_path)
+                            if not moved:
+                                shutil.copy2(path, backup_path)
+                            log.info(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: 已创建文件备份: {backup_path}")
                         
                         # 删除文件
-                        os.remove(path)
-                        self.logger.info(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: 已删除文件 {path}")
+                        if not moved:
+                            os.unlink(path)
+                        log.info(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: 已删除文件 {path}")
                         
                     except Exception as e:
-                        self.logger.error(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: 删除文件 {path} 失败: {e}")
+                        log.error(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: 删除文件 {path} 失败: {e}")
+                    _forget_stat(path)
                 
                 else:
-                    self.logger.warning(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: 未知操作 '{action}'。正在跳过。")
+                    log.warning(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: 未知操作 '{action}'。正在跳过。")
+
+            except Exception as e:
+                log.opt(exception=True).error(f"AI规划任务 {ai_task_id} - 步骤 {step_num + 1}: 执行 '{action}' 时出错: {e}")
+
+        log.info(f"AI规划任务 {ai_task_id} 已完成处理所有计划步骤。")
+        return ai_task_id
+
+    async def astart_ai_planned_task(self, user_goal: str, current_context: Optional[Dict[str, Any]] = None, precomputed_plan: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """异步版start_ai_planned_task：计划生成走并发的agenerate_plan，步骤执行在线程中进行，不阻塞事件循环
 
+        Args:
+            user_goal: 用户的高级别目标
+            current_context: 可选字典，包含相关的系统状态或先前的操作
+            precomputed_plan: 可选的预计算计划，有效时跳过计划生成
+
+        Returns:
+            AI驱动的元任务ID，如果规划或执行失败则返回None
+        """
+        if not self.ai_planner:
+            self.logger.error("AIPlannerService 未初始化，无法启动AI规划任务。")
+            return None
+
+        plan = precomputed_plan
+        if not (isinstance(plan, dict) and plan.get("steps")):
+            try:
+                plan = await self.ai_planner.agenerate_plan(user_goal=user_goal, current_context=current_context)
             except Exception as e:
-                self.logger.error(f"AI规划任务 {self.current_ai_task_id} - 步骤 {step_num + 1}: 执行 '{action}' 时出错: {e}", exc_info=True)
+                self.logger.opt(exception=True).error(f"AI规划任务: 生成计划时发生错误: {e}")
+                return None
+            if not (isinstance(plan, dict) and isinstance(plan.get("steps"), list)):
+                self.logger.error(f"AI规划器未能为目标 '{user_goal}' 生成有效计划。收到的计划: {plan}")
+                return None
+            if not plan["steps"]:
+                # 没有可执行步骤，无需进入线程
+                self.logger.info(f"AI聊天内容: {plan['chat']}" if plan.get("chat") else "AI未提供清理建议，请检查输入或重试。")
+                return None
 
-        self.logger.info(f"AI规划任务 {self.current_ai_task_id} 已完成处理所有计划步骤。")
-        return self.current_ai_task_id
+        # 扫描/清理等待与文件操作均为阻塞调用，整体放到线程中执行
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, functools.partial(self.start_ai_planned_task, user_goal, current_context, plan)
+        )
 
-    def start_scan(self, scan_paths=None, exclude_paths=None) -> str:
+    def start_scan(self, scan_paths=None, exclude_paths=None, batch_queue: Optional[queue.Queue] = None) -> str:
         """启动新的扫描任务
-        
+
         Args:
             scan_paths: 要扫描的路径列表，如果为None则使用配置中的默认路径
             exclude_paths: 要排除的路径列表，如果为None则使用配置中的默认排除路径
-            
+            batch_queue: 可选队列，扫描过程中按批输出已分类的文件项，见Scanner.start_scan
+
         Returns:
             扫描任务ID，如果失败则返回空字符串
         """
         # 启动扫描
-        scan_id = self.scanner.start_scan(scan_paths, exclude_paths)
-        
+        scan_id = self.scanner.start_scan(scan_paths, exclude_paths, batch_queue=batch_queue)
+
         if scan_id:
             self.current_scan_id = scan_id
+            self._last_run_cache["scan"] = (time.monotonic(), time.time())
             logger.info(f"扫描任务已启动: {scan_id}")
         else:
             logger.error("启动扫描任务失败")
-        
+
         return scan_id
+
+    def is_busy(self) -> bool:
+        """检查是否有扫描或清理任务正在运行"""
+        return self.scanner.is_scanning() or self.cleaner.is_cleaning()
+
+    def start_scan_if_idle(self, scan_paths=None, exclude_paths=None) -> str:
+        """在没有扫描或清理任务运行时启动扫描
+
+        Args:
+            scan_paths: 要扫描的路径列表，如果为None则使用配置中的默认路径
+            exclude_paths: 要排除的路径列表，如果为None则使用配置中的默认排除路径
+
+        Returns:
+            扫描任务ID，如果有任务正在运行或启动失败则返回空字符串
+        """
+        with self._start_lock:
+            if self.is_busy():
+                return ""
+            return self.start_scan(scan_paths, exclude_paths)
     
     def get_scan_progress(self) -> Dict:
         """获取当前扫描任务的进度
@@ -445,6 +776,17 @@ class TaskManager:
         """检查扫描任务是否正在活动"""
         return self.scanner.is_scanning()
     
+    def wait_scan(self, timeout: Optional[float] = None) -> bool:
+        """等待当前扫描任务结束
+
+        Args:
+            timeout: 最长等待秒数，None表示一直等待
+
+        Returns:
+            扫描是否已结束（超时返回False）
+        """
+        return self.scanner.wait_until_done(timeout)
+
     def save_scan_result(self) -> bool:
         """保存当前扫描结果到数据库
         
@@ -504,6 +846,42 @@ class TaskManager:
         """
         return self.db.list_scan_results(limit, offset)
     
+    def get_last_scan_time(self) -> Optional[float]:
+        """获取最近一次扫描的开始时间，结果在进程内缓存 LAST_RUN_CACHE_TTL 秒
+
+        Returns:
+            时间戳（秒），没有扫描记录时返回None
+        """
+        return self._get_last_run_time("scan", self.list_scan_results, "start_time")
+
+    def get_last_clean_time(self) -> Optional[float]:
+        """获取最近一次清理任务的创建时间，结果在进程内缓存 LAST_RUN_CACHE_TTL 秒
+
+        Returns:
+            时间戳（秒），没有清理记录时返回None
+        """
+        return self._get_last_run_time(
+            "clean", lambda limit: self.list_clean_tasks(limit=limit)["items"], "created_time")
+
+    def _get_last_run_time(self, kind: str, list_func, time_field: str) -> Optional[float]:
+        """查询并缓存最近一次任务的时间
+
+        Args:
+            kind: 缓存键，"scan" 或 "clean"
+            list_func: 按时间倒序列出历史记录的方法
+            time_field: 记录中的时间字段名
+
+        Returns:
+            时间戳（秒），没有记录时返回None
+        """
+        cached = self._last_run_cache.get(kind)
+        if cached and time.monotonic() - cached[0] < LAST_RUN_CACHE_TTL:
+            return cached[1]
+        records = list_func(limit=1)
+        last_time = records[0][time_field].timestamp() if records else None
+        self._last_run_cache[kind] = (time.monotonic(), last_time)
+        return last_time
+
     def delete_scan_result(self, scan_id: str) -> bool:
         """删除扫描结果
         
@@ -520,7 +898,8 @@ class TaskManager:
         return self.db.delete_scan_result(scan_id)
     
     def start_clean_task(self, scan_id=None, categories=None, 
-                      create_backup=None, task_name=None) -> str:
+                      create_backup=None, task_name=None,
+                      scan_result: Optional[ScanResult] = None) -> str:
         """启动新的清理任务
         
         Args:
@@ -528,6 +907,7 @@ class TaskManager:
             categories: 要清理的类别列表，如果为None则清理所有类别
             create_backup: 是否创建备份，如果为None则使用配置值
             task_name: 任务名称，如果为None则自动生成
+            scan_result: 调用方已加载的扫描结果（可选），提供时不再重新获取
             
         Returns:
             清理任务ID，如果失败则返回空字符串
@@ -540,7 +920,8 @@ class TaskManager:
             return ""
         
         # 获取扫描结果
-        scan_result = self.get_scan_result(scan_id)
+        if scan_result is None or scan_result.scan_id != scan_id:
+            scan_result = self.get_scan_result(scan_id)
         if not scan_result:
             logger.warning(f"找不到扫描结果: {scan_id}")
             return ""
@@ -553,37 +934,23 @@ class TaskManager:
         # 获取重复文件集，用于 can_delete 判断
         duplicate_sets = scan_result.duplicate_sets
         
-        # 过滤要清理的文件
-        files_to_clean = scan_result.files
-        if categories:
-            # 将字符串类别转换为枚举
-            target_categories = {CleanCategory(c) for c in categories if c in CleanCategory.__members__}
-            files_to_clean = [
-                file for file in files_to_clean 
-                if file.category in target_categories and self.rule_manager.can_delete(file, duplicate_sets)
-            ]
-        else:
-            files_to_clean = [
-                file for file in files_to_clean 
-                if self.rule_manager.can_delete(file, duplicate_sets)
-            ]
-        
-        # 如果指定了清理 DUPLICATE_FILES 类别，我们需要特殊处理
-        # 确保只删除重复文件中的副本，保留一个
-        if categories and CleanCategory.DUPLICATE_FILES in categories:
-            duplicate_files_to_clean = []
-            for file in scan_result.files: # 重新遍历原始文件列表
-                if self.rule_manager.can_delete(file, duplicate_sets): # 检查是否是可删除的重复文件
-                    if file not in files_to_clean: # 避免重复添加
-                         duplicate_files_to_clean.append(file)
-            files_to_clean.extend(duplicate_files_to_clean)
-            # 去重，以防万一
-            files_to_clean = list({file.path: file for file in files_to_clean}.values())
-            
+        # 过滤要清理的文件：以生成器交给清理器，在其单次遍历中完成筛选，不生成中间列表
+        # 未指定类别或指定了 DUPLICATE_FILES 时，所有可删除文件都纳入清理（重复文件只删除副本，
+        # 由 can_delete 保证保留一个）；否则只清理目标类别中的可删除文件
+        target_categories = _parse_categories(categories)
+        include_all = not categories or CleanCategory.DUPLICATE_FILES in target_categories
+        can_delete = self.rule_manager.can_delete
+        # 每组重复文件的保留文件只计算一次，之后逐文件判断只需查表
+        duplicate_index = self.rule_manager.build_duplicate_index(duplicate_sets)
 
-        if not files_to_clean:
-            logger.warning("没有符合条件的文件需要清理")
-            return ""
+        def _iter_files_to_clean():
+            seen_paths: Set[str] = set()
+            for file in scan_result.files:
+                if file.path in seen_paths:
+                    continue
+                if (include_all or file.category in target_categories) and can_delete(file, duplicate_index=duplicate_index):
+                    seen_paths.add(file.path)
+                    yield file
         
         # 生成任务名称
         if not task_name:
@@ -592,7 +959,7 @@ class TaskManager:
         
         # 启动清理任务
         task_id = self.cleaner.start_clean_task(
-            files_to_clean=files_to_clean,
+            files_to_clean=_iter_files_to_clean(),
             categories=categories,
             task_name=task_name,
             create_backup=create_backup
@@ -600,18 +967,96 @@ class TaskManager:
         
         if task_id:
             self.current_clean_id = task_id
+            self._last_run_cache["clean"] = (time.monotonic(), time.time())
             
             # 将清理任务保存到数据库
             task = self.cleaner.get_current_task()
             if task:
                 task.scan_id = scan_id
-                self.db.save_clean_task(task)
+                self._save_clean_task(task)
             
             logger.info(f"清理任务已启动: {task_id}")
         else:
             logger.error("启动清理任务失败")
         
         return task_id
+
+    def can_stream_clean(self, categories=None, create_backup=None) -> bool:
+        """判断清理能否与扫描流水线并行执行
+
+        重复文件判定需要完整扫描结果，且流式清理无法创建整体备份，
+        因此只有指定了类别、不含 DUPLICATE_FILES 且不要求备份时才可流式清理。
+
+        Args:
+            categories: 要清理的类别列表
+            create_backup: 是否创建备份，如果为None则使用配置值
+
+        Returns:
+            是否可以流式清理
+        """
+        if create_backup is None:
+            create_backup = self.config.get("safety.backup.enabled", True)
+        target_categories = _parse_categories(categories)
+        return bool(target_categories) and CleanCategory.DUPLICATE_FILES not in target_categories and not create_backup
+
+    def start_streaming_clean_task(self, batch_queue: queue.Queue, categories=None, task_name=None) -> str:
+        """边扫描边清理：从扫描器的批次队列读取文件，只清理目标类别中可删除的文件
+
+        调用前应先用 can_stream_clean 确认可以流式清理。
+
+        Args:
+            batch_queue: 传给 start_scan 的批次队列
+            categories: 要清理的类别列表
+            task_name: 任务名称，如果为None则自动生成
+
+        Returns:
+            清理任务ID，如果失败则返回空字符串
+        """
+        target_categories = _parse_categories(categories)
+        can_delete = self.rule_manager.can_delete
+
+        def _file_filter(file: FileItem) -> bool:
+            return file.category in target_categories and can_delete(file)
+
+        task_id = self.cleaner.start_streaming_clean(
+            batch_queue,
+            file_filter=_file_filter,
+            categories=categories,
+            task_name=task_name
+        )
+
+        if task_id:
+            self.current_clean_id = task_id
+            self._last_run_cache["clean"] = (time.monotonic(), time.time())
+            # 将清理任务保存到数据库
+            task = self.cleaner.get_current_task()
+            if task:
+                task.scan_id = self.current_scan_id
+                self._save_clean_task(task)
+
+            logger.info(f"流式清理任务已启动: {task_id}")
+        else:
+            logger.error("启动流式清理任务失败")
+
+        return task_id
+
+    def start_clean_task_if_idle(self, scan_id=None, categories=None,
+                                 create_backup=None, task_name=None) -> str:
+        """在没有扫描或清理任务运行时启动清理任务
+
+        Args:
+            scan_id: 扫描ID，如果为None则使用当前扫描ID
+            categories: 要清理的类别列表，如果为None则清理所有类别
+            create_backup: 是否创建备份，如果为None则使用配置值
+            task_name: 任务名称，如果为None则自动生成
+
+        Returns:
+            清理任务ID，如果有任务正在运行或启动失败则返回空字符串
+        """
+        with self._start_lock:
+            if self.is_busy():
+                return ""
+            return self.start_clean_task(scan_id, categories, create_backup, task_name)
     
     def get_clean_progress(self) -> Dict:
         """获取当前清理任务的进度
@@ -653,13 +1098,24 @@ class TaskManager:
         if result and self.current_clean_id:
             task = self.cleaner.get_current_task()
             if task:
-                self.db.save_clean_task(task)
+                self._save_clean_task(task)
         
         return result
 
     def is_clean_active(self) -> bool:
         """检查清理任务是否正在活动"""
         return self.cleaner.is_cleaning()
+
+    def wait_clean(self, timeout: Optional[float] = None) -> bool:
+        """等待当前清理任务结束
+
+        Args:
+            timeout: 最长等待秒数，None表示一直等待
+
+        Returns:
+            清理任务是否已结束（超时返回False）
+        """
+        return self.cleaner.wait_until_done(timeout)
     
     def pause_clean_task(self) -> bool:
         """暂停当前清理任务
@@ -676,7 +1132,7 @@ class TaskManager:
         if result and self.current_clean_id:
             task = self.cleaner.get_current_task()
             if task:
-                self.db.save_clean_task(task)
+                self._save_clean_task(task)
         
         return result
 
@@ -699,13 +1155,48 @@ class TaskManager:
         if result and self.current_clean_id:
             task = self.cleaner.get_current_task()
             if task:
-                self.db.save_clean_task(task)
+                self._save_clean_task(task)
         
         return result
 
     def is_clean_active(self) -> bool:
         """检查清理任务是否正在活动"""
         return self.cleaner.is_cleaning()
+
+    def _memo(self, key, fn):
+        """返回缓存的查询结果，版本号变化或超过READ_CACHE_TTL时重新查询"""
+        hit = self._read_cache.get(key)
+        if hit is not None and hit[0] == self._cache_epoch and time.monotonic() - hit[1] < READ_CACHE_TTL:
+            return hit[2]
+        epoch = self._cache_epoch
+        value = fn()
+        self._read_cache[key] = (epoch, time.monotonic(), value)
+        return value
+
+    def _invalidate_read_cache(self):
+        """清理任务或备份发生变化后调用，使只读查询缓存失效"""
+        self._cache_epoch += 1
+        self._read_cache.clear()
+
+    def _save_clean_task(self, task: CleanTask):
+        """保存清理任务到数据库并使查询缓存失效"""
+        self.db.save_clean_task(task)
+        self._invalidate_read_cache()
+
+    def _sync_finished_clean_task(self):
+        """当前清理任务结束后，把最终状态写入数据库（只写一次）
+
+        清理在后台线程中结束，没有回调通知，因此在读取任务信息前检查。
+        """
+        task_id = self.current_clean_id
+        if not task_id or task_id == self._persisted_clean_id or self.cleaner.is_cleaning():
+            return
+        task = self.cleaner.get_current_task()
+        if task is None or task.task_id != task_id or task.status not in FINISHED_CLEAN_STATUSES:
+            return
+        self._persisted_clean_id = task_id
+        self._finished_clean_tasks[task_id] = task
+        self._save_clean_task(task)
     
     def get_clean_task(self, task_id=None) -> Optional[CleanTask]:
         """获取清理任务
@@ -724,23 +1215,53 @@ class TaskManager:
             return None
         
         # 如果是当前正在进行的任务，直接从Cleaner获取
-        if task_id == self.current_clean_id and self.cleaner._is_cleaning:
-            return self.cleaner.get_current_task()
+        is_cleaning, current_task = self.cleaner.snapshot()
+        if is_cleaning and current_task is not None and current_task.task_id == task_id:
+            return current_task
+
+        self._sync_finished_clean_task()
+        finished = self._finished_clean_tasks.get(task_id)
+        if finished is not None:
+            return finished
         
         # 否则从数据库获取
-        return self.db.get_clean_task(task_id)
+        task = self._memo(("clean_task", task_id), lambda: self.db.get_clean_task(task_id))
+        if task is not None and task.status in FINISHED_CLEAN_STATUSES:
+            self._finished_clean_tasks[task_id] = task
+        return task
     
-    def list_clean_tasks(self, limit=10, offset=0) -> List[Dict]:
-        """列出历史清理任务
+    def list_clean_tasks(self, limit=10, cursor: Optional[Tuple[str, str]] = None) -> Dict[str, Any]:
+        """列出历史清理任务（按创建时间倒序，键集分页）
         
         Args:
-            limit: 结果数量限制
-            offset: 结果偏移量
+            limit: 每页数量
+            cursor: 上一页返回的next_cursor，None表示第一页
             
         Returns:
-            清理任务摘要列表
+            {"items": 清理任务摘要列表, "next_cursor": 下一页游标，没有更多时为None}
+        """
+        self._sync_finished_clean_task()
+        return self._memo(("clean_tasks", limit, cursor), lambda: self.db.list_clean_tasks(limit, cursor))
+
+    def iter_clean_tasks(self, batch_size: int = CLEAN_TASK_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+        """按创建时间倒序逐条产出全部历史清理任务
+
+        内部按键集分页分批查询，内存占用与历史总数无关，第一条记录只需一次批量查询。
+
+        Args:
+            batch_size: 每批查询的记录数
+
+        Yields:
+            清理任务摘要
         """
-        return self.db.list_clean_tasks(limit, offset)
+        self._sync_finished_clean_task()
+        cursor = None
+        while True:
+            page = self.db.list_clean_tasks(batch_size, cursor)
+            yield from page["items"]
+            cursor = page["next_cursor"]
+            if not cursor:
+                return
     
     def delete_clean_task(self, task_id: str) -> bool:
         """删除清理任务
@@ -751,11 +1272,15 @@ class TaskManager:
         Returns:
             是否删除成功
         """
-        if task_id == self.current_clean_id and self.cleaner._is_cleaning:
+        is_cleaning, current_task = self.cleaner.snapshot()
+        if is_cleaning and current_task is not None and current_task.task_id == task_id:
             logger.warning("不能删除正在进行的清理任务")
             return False
         
-        return self.db.delete_clean_task(task_id)
+        deleted = self.db.delete_clean_task(task_id)
+        self._finished_clean_tasks.pop(task_id, None)
+        self._invalidate_read_cache()
+        return deleted
     
     def restore_from_backup(self, backup_id: str, selected_files=None) -> bool:
         """从备份还原文件
@@ -767,7 +1292,9 @@ class TaskManager:
         Returns:
             是否成功还原
         """
-        return self.rollback.restore_backup(backup_id, selected_files)
+        restored = self.rollback.restore_backup(backup_id, selected_files)
+        self._invalidate_read_cache()
+        return restored
     
     def list_backups(self) -> List[Dict]:
         """列出所有可用的备份
@@ -775,7 +1302,7 @@ class TaskManager:
         Returns:
             备份信息列表
         """
-        return self.rollback.list_backups()
+        return self._memo(("backups",), self.rollback.list_backups)
     
     def delete_backup(self, backup_id: str) -> bool:
         """删除备份
@@ -786,7 +1313,9 @@ class TaskManager:
         Returns:
             是否成功删除
         """
-        return self.rollback.delete_backup(backup_id)
+        deleted = self.rollback.delete_backup(backup_id)
+        self._invalidate_read_cache()
+        return deleted
     
     def clean_old_backups(self, days=None) -> int:
         """清理旧备份
@@ -797,42 +1326,39 @@ class TaskManager:
         Returns:
             清理的备份数量
         """
-        return self.rollback.clean_old_backups(days)
+        cleaned = self.rollback.clean_old_backups(days)
+        self._invalidate_read_cache()
+        return cleaned
     
     def close(self):
         """关闭任务管理器，释放资源"""
-        self.logger.info("开始关闭任务管理器...")
+        # 执行过的关闭步骤，最后合并为一条日志记录
+        steps = []
 
-        # 停止进行中的任务
-        if hasattr(self, 'scanner') and self.scanner and self.scanner._is_scanning: 
-            self.logger.info("停止扫描任务...")
-            self.scanner.stop_scan()
+        # 停止进行中的任务：扫描和清理互不依赖，各自等待工作线程退出可能较久，并发停止
+        stoppers = []
+        if self.scanner._is_scanning:
+            steps.append("停止扫描任务")
+            stoppers.append(self.scanner.stop_scan)
 
-        if hasattr(self, 'cleaner') and self.cleaner and self.cleaner._is_cleaning: 
-            self.logger.info("停止清理任务...")
-            self.cleaner.stop_clean_task()
+        if self.cleaner._is_cleaning:
+            steps.append("停止清理任务")
+            stoppers.append(self.cleaner.stop_clean_task)
 
-        # 关闭日志服务 (if it was initialized)
-        if hasattr(self, 'logger_service') and self.logger_service:
-            try:
-                self.logger.info("关闭日志服务...")
-                self.logger_service.close()
-            except Exception as e:
-                # Use global logger if self.logger might not be available
-                fallback_logger = logger if not hasattr(self, 'logger') else self.logger
-                fallback_logger.error(f"关闭LoggerService时出错: {e}", exc_info=True)
-        
-        # 关闭数据库连接 (if it was initialized and not already closed by LoggerService)
-        # LoggerService might share the db instance, so check if it's still open
-        # and if self.db was initialized in the first place.
-        if hasattr(self, 'db') and self.db and hasattr(self.db, 'conn') and self.db.conn: 
-             try:
-                self.logger.info("关闭数据库连接...")
-                self.db.close()
-             except Exception as e:
-                fallback_logger = logger if not hasattr(self, 'logger') else self.logger
-                fallback_logger.error(f"关闭TaskManager中的数据库时出错: {e}", exc_info=True)
-
-        # Use global logger if self.logger is not available (e.g. during __init__ failure)
-        final_logger = logger if not hasattr(self, 'logger') else self.logger
-        final_logger.info("任务管理器已关闭")
\ No newline at end of file
+        if stoppers:
+            with ThreadPoolExecutor(max_workers=len(stoppers)) as executor:
+                for future in [executor.submit(stop) for stop in stoppers]:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        self.logger.opt(exception=True).error("停止任务时出错: {}", e)
+
+        # 先关闭日志服务（写出剩余日志），再关闭数据库连接；已执行过的finalizer再次调用不会重复关闭
+        for finalizer, step in ((self._logger_finalizer, "关闭日志服务"), (self._db_finalizer, "关闭数据库连接")):
+            if finalizer is not None and finalizer.alive:
+                steps.append(step)
+                finalizer()
+
+        self.logger.opt(lazy=True).info(
+            "任务管理器已关闭（{}）", lambda: "、".join(steps) or "无进行中的任务"
+        )
\ No newline at end of file
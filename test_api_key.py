@@ -8,6 +8,7 @@ API密钥测试脚本
 import argparse
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 # 添加项目根目录到Python路径
@@ -16,7 +17,12 @@ sys.path.insert(0, str(project_root))
 
 from services.ai_planner import AIPlannerService
 from config.manager import ConfigManager
-from services.logger import setup_logger
+from services.logger import get_logger_service
+
+# 单次API测试请求的超时时间（秒），避免不可达的端点让脚本一直挂起
+API_TEST_TIMEOUT = 10
+# 错误信息最多输出的字符数
+ERROR_PREVIEW_CHARS = 512
 
 def test_qwen_api(api_key):
     """测试Qwen API密钥"""
@@ -24,25 +30,26 @@ def test_qwen_api(api_key):
         import dashscope
         dashscope.api_key = api_key
         
-        # 测试API调用
+        # 测试API调用：DashScope SDK没有只读的模型查询接口，只生成1个token
         response = dashscope.Generation.call(
             model='qwen-turbo',
             prompt='测试',
-            max_tokens=10
+            max_tokens=1,
+            request_timeout=API_TEST_TIMEOUT
         )
         
         if response.status_code == 200:
             print("✅ Qwen API密钥有效")
             return True
         else:
-            print(f"❌ Qwen API调用失败: {response.message}")
+            print(f"❌ Qwen API调用失败: {str(response.message)[:ERROR_PREVIEW_CHARS]}")
             return False
             
     except ImportError:
         print("❌ 缺少dashscope依赖，请运行: pip install dashscope")
         return False
     except Exception as e:
-        print(f"❌ Qwen API测试失败: {str(e)}")
+        print(f"❌ Qwen API测试失败: {str(e)[:ERROR_PREVIEW_CHARS]}")
         return False
 
 def test_gemini_api(api_key):
@@ -51,11 +58,10 @@ def test_gemini_api(api_key):
         import google.generativeai as genai
         genai.configure(api_key=api_key)
         
-        # 测试API调用
-        model = genai.GenerativeModel('gemini-pro')
-        response = model.generate_content('测试')
+        # 查询模型元数据即可验证密钥（无效密钥会抛出异常），不触发内容生成，也不消耗生成配额
+        model_info = genai.get_model('models/gemini-pro', request_options={'timeout': API_TEST_TIMEOUT})
         
-        if response.text:
+        if model_info is not None:
             print("✅ Gemini API密钥有效")
             return True
         else:
@@ -66,9 +72,15 @@ def test_gemini_api(api_key):
         print("❌ 缺少google-generativeai依赖，请运行: pip install google-generativeai")
         return False
     except Exception as e:
-        print(f"❌ Gemini API测试失败: {str(e)}")
+        print(f"❌ Gemini API测试失败: {str(e)[:ERROR_PREVIEW_CHARS]}")
         return False
 
+# 模型 -> (显示名称, 环境变量, 配置文件中的键, 测试函数)
+PROVIDERS = {
+    'qwen': ('Qwen', 'QWEN_API_KEY', 'qwen_api_key', test_qwen_api),
+    'gemini': ('Gemini', 'GEMINI_API_KEY', 'gemini_api_key', test_gemini_api),
+}
+
 def main():
     parser = argparse.ArgumentParser(description='测试AI模型API密钥')
     parser.add_argument('--model', choices=['qwen', 'gemini', 'all'], 
@@ -77,7 +89,7 @@ def main():
     args = parser.parse_args()
     
     # 设置日志
-    logger = setup_logger()
+    logger = get_logger_service().get_logger(__name__)
     
     # 加载配置
     try:
@@ -91,37 +103,31 @@ def main():
     
     success = True
     
-    if args.model in ['qwen', 'all']:
-        print("\n测试Qwen API...")
+    # 先收集各模型的密钥，两个API测试都是阻塞的网络请求，随后并发执行
+    jobs = {}
         
+    for model in (['qwen', 'gemini'] if args.model == 'all' else [args.model]):
+        label, env_var, config_key, test_func = PROVIDERS[model]
         # 从环境变量或配置文件获取API密钥
-        qwen_key = os.getenv('QWEN_API_KEY')
-        if not qwen_key and 'ai' in config and 'qwen_api_key' in config['ai']:
-            qwen_key = config['ai']['qwen_api_key']
+        api_key = os.getenv(env_var)
+        if not api_key and 'ai' in config and config_key in config['ai']:
+            api_key = config['ai'][config_key]
         
-        if qwen_key:
-            if not test_qwen_api(qwen_key):
-                success = False
+        if api_key:
+            jobs[label] = (test_func, api_key)
         else:
-            print("❌ 未找到Qwen API密钥")
-            print("   请设置环境变量QWEN_API_KEY或在config/default.yaml中配置")
+            print(f"\n❌ 未找到{label} API密钥")
+            print(f"   请设置环境变量{env_var}或在config/default.yaml中配置")
             success = False
     
-    if args.model in ['gemini', 'all']:
-        print("\n测试Gemini API...")
-        
-        # 从环境变量或配置文件获取API密钥
-        gemini_key = os.getenv('GEMINI_API_KEY')
-        if not gemini_key and 'ai' in config and 'gemini_api_key' in config['ai']:
-            gemini_key = config['ai']['gemini_api_key']
-        
-        if gemini_key:
-            if not test_gemini_api(gemini_key):
-                success = False
-        else:
-            print("❌ 未找到Gemini API密钥")
-            print("   请设置环境变量GEMINI_API_KEY或在config/default.yaml中配置")
-            success = False
+    if jobs:
+        print(f"\n测试 {', '.join(jobs)} API...")
+        # 结果按完成顺序输出
+        with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+            futures = {executor.submit(fn, key): name for name, (fn, key) in jobs.items()}
+            for future in as_completed(futures):
+                if not future.result():
+                    success = False
     
     print("\n=== 测试完成 ===")
     
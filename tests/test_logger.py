@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from loguru import logger
+
+from data.database import Database
+from services.logger import DatabaseHandler
+
+
+class TestDatabaseHandler(unittest.TestCase):
+    def setUp(self):
+        """创建临时数据库，并把只接收本测试日志的处理器挂到loguru上"""
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.db = Database(self.tmp_dir / "cleaner.db")
+        self.handler = DatabaseHandler(self.db)
+        # 同步sink，写入后立即进入处理器缓冲
+        self.sink_id = logger.add(
+            self.handler.write, level="INFO",
+            filter=lambda record: record["extra"].get("db_handler_test", False)
+        )
+        self.log = logger.bind(db_handler_test=True)
+
+    def tearDown(self):
+        """移除sink并删除临时文件"""
+        logger.remove(self.sink_id)
+        self.handler.close()
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _count_logs(self) -> int:
+        return self.db.query("SELECT COUNT(*) FROM logs")[0][0]
+
+    def test_flush_by_size(self):
+        """测试缓冲达到FLUSH_SIZE条时批量写入"""
+        self.handler.FLUSH_SIZE = 3
+        self.handler.FLUSH_INTERVAL = 3600
+        self.log.info("第一条")
+        self.log.info("第二条")
+        self.assertEqual(self._count_logs(), 0)
+        self.log.info("第三条")
+        self.assertEqual(self._count_logs(), 3)
+        rows = self.db.query("SELECT message FROM logs ORDER BY id")
+        self.assertEqual([r[0] for r in rows], ["第一条", "第二条", "第三条"])
+
+    def test_flush_by_interval(self):
+        """测试距上次写入超过FLUSH_INTERVAL秒后，下一条日志触发批量写入"""
+        self.handler.FLUSH_SIZE = 1000
+        self.handler.FLUSH_INTERVAL = 0.05
+        self.handler.flush()
+        self.log.info("第一条")
+        self.assertEqual(self._count_logs(), 0)
+        time.sleep(self.handler.FLUSH_INTERVAL * 2)
+        self.log.info("第二条")
+        self.assertEqual(self._count_logs(), 2)
+
+    def test_close_flushes_and_keeps_caller_database(self):
+        """测试关闭处理器时写出剩余日志，且不关闭调用方传入的数据库"""
+        self.handler.FLUSH_SIZE = 1000
+        self.handler.FLUSH_INTERVAL = 3600
+        self.log.info("剩余日志")
+        self.assertEqual(self._count_logs(), 0)
+        self.handler.close()
+        self.assertIsNotNone(self.db.conn)
+        self.assertEqual(self._count_logs(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from loguru import logger
+
+from config.manager import ConfigManager
+from data.database import Database
+from data.models import ScanResult
+from services.logger import get_logger_service
+from services.task_manager import TaskManager
+from services.scheduler import SchedulerService
+
+# 等待扫描结束的最长时间（秒）
+SCAN_TIMEOUT = 30
+
+
+class TestTaskManager(unittest.TestCase):
+    def setUp(self):
+        """每个测试使用独立的临时数据库和扫描目录"""
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.scan_dir = self.tmp_dir / "scan"
+        self.scan_dir.mkdir()
+        (self.scan_dir / "temp.tmp").write_text("temporary file content")
+
+        self.config = ConfigManager.shared().clone()
+        self.config.set('scanner.include_dirs', [str(self.scan_dir)])
+        self.config.set('scanner.exclude_dirs', [])
+        self.db = Database(self.tmp_dir / "cleaner.db")
+        self.task_manager = TaskManager(config_manager=self.config, database=self.db)
+
+    def tearDown(self):
+        """关闭任务管理器并删除临时文件"""
+        self.task_manager.close()
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _save_scan(self, scan_id: str, start_time: datetime):
+        """向数据库写入一条已完成的扫描结果"""
+        result = ScanResult(
+            scan_id=scan_id,
+            start_time=start_time,
+            end_time=start_time + timedelta(seconds=5),
+            scan_paths=[str(self.scan_dir)],
+            is_complete=True
+        )
+        self.assertTrue(self.db.save_scan_result(result))
+        return result
+
+    def test_logs_reach_database(self):
+        """测试任务管理器的日志写入数据库logs表"""
+        handler = self.task_manager.logger_service.db_handler
+        self.assertIsNotNone(handler)
+        self.task_manager.logger.info("数据库日志测试")
+        # 等待loguru后台队列处理完，再写出处理器缓冲
+        logger.complete()
+        handler.flush()
+        rows = self.db.query("SELECT level, message FROM logs WHERE message = ?", ("数据库日志测试",))
+        self.assertEqual(rows, [("INFO", "数据库日志测试")])
+
+    def test_shared_logger_service(self):
+        """测试任务管理器使用进程内共享的日志服务"""
+        self.assertIs(self.task_manager.logger_service, get_logger_service())
+
+    def test_close_keeps_shared_resources(self):
+        """测试关闭任务管理器不关闭调用方传入的数据库，也不移除其他实例添加的数据库日志sink"""
+        other = TaskManager(config_manager=self.config, database=self.db)
+        other.close()
+        other.close()
+        self.assertIsNotNone(self.db.conn)
+        self.assertIsNotNone(self.task_manager.logger_service.db_handler)
+
+        self.task_manager.close()
+        self.assertIsNotNone(self.db.conn)
+        self.assertIsNone(self.task_manager.logger_service.db_handler)
+
+    def test_scan_result_storage(self):
+        """测试扫描结果的保存、列出、读取和删除"""
+        now = datetime.now()
+        self._save_scan("old", now - timedelta(days=3))
+        self._save_scan("new", now)
+
+        summaries = self.task_manager.list_scan_results(limit=10)
+        self.assertEqual([s["scan_id"] for s in summaries], ["new", "old"])
+        self.assertEqual(summaries[0]["start_time"], now)
+
+        loaded = self.task_manager.get_scan_result("old")
+        self.assertIsNotNone(loaded)
+        self.assertTrue(loaded.is_complete)
+        self.assertEqual(loaded.scan_paths, [str(self.scan_dir)])
+
+        self.assertTrue(self.task_manager.delete_scan_result("old"))
+        self.assertIsNone(self.task_manager.get_scan_result("old"))
+
+    def test_last_scan_time(self):
+        """测试最近一次扫描时间取自已保存的扫描结果"""
+        now = datetime.now()
+        self._save_scan("old", now - timedelta(days=3))
+        self._save_scan("new", now)
+        self.assertEqual(self.task_manager.get_last_scan_time(), now.timestamp())
+
+    def test_auto_scan(self):
+        """测试定时自动扫描：距上次扫描超过间隔天数时启动扫描"""
+        self._save_scan("old", datetime.now() - timedelta(days=10))
+        scheduler = SchedulerService(config_manager=self.config, task_manager=self.task_manager)
+
+        scheduler._run_auto_scan(interval_days=7)
+        self.assertIsNotNone(self.task_manager.current_scan_id)
+        self.assertTrue(self.task_manager.wait_scan(timeout=SCAN_TIMEOUT))
+
+    def test_auto_scan_skips_recent_scan(self):
+        """测试定时自动扫描：未达到间隔天数时不启动扫描"""
+        self._save_scan("recent", datetime.now() - timedelta(days=1))
+        scheduler = SchedulerService(config_manager=self.config, task_manager=self.task_manager)
+
+        scheduler._run_auto_scan(interval_days=7)
+        self.assertIsNone(self.task_manager.current_scan_id)
+
+
+if __name__ == '__main__':
+    unittest.main()